@@ -1,9 +1,10 @@
 from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy import func
 from sqlalchemy.orm import Session
 from pydantic import BaseModel, ConfigDict
 from datetime import datetime
 from app.models.analytics_log import AnalyticsLog, ActionEnum
-from app.database.db import get_db
+from app.database.db import get_db, get_read_db
 
 router = APIRouter()
 
@@ -17,12 +18,24 @@ class AnalyticsLogResponse(BaseModel):
 
     model_config = ConfigDict(from_attributes=True)
 
-@router.get("/", response_model=list[AnalyticsLogResponse])
-async def get_analytics_logs(user_id: int = None, db: Session = Depends(get_db)):
+def _logs_query(db: Session, user_id: int | None):
     query = db.query(AnalyticsLog)
     if user_id:
         query = query.filter(AnalyticsLog.user_id == user_id)
-    return query.order_by(AnalyticsLog.timestamp.desc()).all()
+    return query.order_by(AnalyticsLog.timestamp.desc())
+
+def _stats_query(db: Session, user_id: int):
+    """Количество действий пользователя по типам"""
+    return db.query(
+        AnalyticsLog.action,
+        func.count(AnalyticsLog.log_id).label('count')
+    ).filter(
+        AnalyticsLog.user_id == user_id
+    ).group_by(AnalyticsLog.action)
+
+@router.get("/", response_model=list[AnalyticsLogResponse])
+async def get_analytics_logs(user_id: int = None, db: Session = Depends(get_read_db)):
+    return _logs_query(db, user_id).all()
 
 @router.get("/{log_id}", response_model=AnalyticsLogResponse)
 async def get_analytics_log(log_id: int, db: Session = Depends(get_db)):
@@ -32,17 +45,9 @@ async def get_analytics_log(log_id: int, db: Session = Depends(get_db)):
     return log
 
 @router.get("/stats/{user_id}")
-async def get_analytics_stats(user_id: int, db: Session = Depends(get_db)):
+async def get_analytics_stats(user_id: int, db: Session = Depends(get_read_db)):
     """Получение статистики по действиям пользователя"""
-    from sqlalchemy import func
-    from app.models.analytics_log import ActionEnum
-    
-    stats = db.query(
-        AnalyticsLog.action,
-        func.count(AnalyticsLog.log_id).label('count')
-    ).filter(
-        AnalyticsLog.user_id == user_id
-    ).group_by(AnalyticsLog.action).all()
+    stats = _stats_query(db, user_id).all()
     
     result = {
         "user_id": user_id,
@@ -0,0 +1,177 @@
+import json
+import posixpath
+import re
+from typing import Any, Literal
+from urllib.parse import urlencode
+from fastapi import APIRouter, BackgroundTasks, HTTPException, Request
+from pydantic import BaseModel
+from app.database.db import SessionLocal, engine, batch_session, batch_background
+
+router = APIRouter()
+
+MAX_BATCH_SIZE = 50
+
+# Ссылка на результат предыдущего шага: ${step_id.field.0.subfield}
+REFERENCE = re.compile(r"\$\{([^}]+)\}")
+
+class SubRequest(BaseModel):
+    id: str | None = None
+    method: Literal["GET", "POST", "PUT", "DELETE"]
+    path: str
+    query: dict[str, Any] | None = None
+    body: Any = None
+
+class BatchRequest(BaseModel):
+    requests: list[SubRequest]
+    atomic: bool = False
+
+class SubResponse(BaseModel):
+    id: str | None
+    status: int
+    body: Any
+
+class BatchResponse(BaseModel):
+    results: list[SubResponse]
+    committed: bool
+
+def _is_batch_path(path: str) -> bool:
+    normalized = posixpath.normpath("/" + str(path).split("?", 1)[0].lstrip("/"))
+    return normalized == "/batch" or normalized.startswith("/batch/")
+
+def _lookup(reference: str, results: dict[str, Any]):
+    step_id, *fields = reference.split(".")
+    if step_id not in results:
+        raise HTTPException(status_code=400, detail=f"Unknown batch reference: {reference}")
+    value = results[step_id]
+    try:
+        for field in fields:
+            value = value[int(field)] if isinstance(value, list) else value[field]
+    except (KeyError, IndexError, ValueError, TypeError):
+        raise HTTPException(status_code=400, detail=f"Cannot resolve batch reference: {reference}")
+    return value
+
+def _resolve(value, results: dict[str, Any]):
+    """Подставляет ${...} из ответов предыдущих шагов (целиком строка — с сохранением типа)"""
+    if isinstance(value, str):
+        match = REFERENCE.fullmatch(value)
+        if match:
+            return _lookup(match.group(1), results)
+        return REFERENCE.sub(lambda m: str(_lookup(m.group(1), results)), value)
+    if isinstance(value, list):
+        return [_resolve(item, results) for item in value]
+    if isinstance(value, dict):
+        return {key: _resolve(item, results) for key, item in value.items()}
+    return value
+
+async def _call(request: Request, method: str, path: str, query: dict | None, body: Any) -> tuple[int, Any]:
+    """Выполняет подзапрос через ASGI-приложение в том же процессе, без HTTP"""
+    payload = json.dumps(body).encode() if body is not None else b""
+    scope = {
+        "type": "http",
+        "asgi": request.scope.get("asgi", {"version": "3.0"}),
+        "http_version": "1.1",
+        "method": method,
+        "scheme": request.url.scheme,
+        "server": request.scope.get("server"),
+        "client": request.scope.get("client"),
+        "root_path": "",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": urlencode(query or {}, doseq=True).encode(),
+        "headers": [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(payload)).encode()),
+        ],
+    }
+    sent = False
+
+    async def receive():
+        nonlocal sent
+        if not sent:
+            sent = True
+            return {"type": "http.request", "body": payload, "more_body": False}
+        return {"type": "http.disconnect"}
+
+    status = 500
+    chunks: list[bytes] = []
+
+    async def send(message):
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+        elif message["type"] == "http.response.body":
+            chunks.append(message.get("body", b""))
+
+    try:
+        await request.app(scope, receive, send)
+    except Exception as e:
+        # ServerErrorMiddleware пробрасывает исключение дальше: превращаем его в результат шага
+        return 500, {"detail": f"Error in batch step: {str(e)}"}
+    raw = b"".join(chunks)
+    try:
+        return status, json.loads(raw) if raw else None
+    except ValueError:
+        return status, raw.decode(errors="replace")
+
+@router.post("/", response_model=BatchResponse)
+async def run_batch(batch: BatchRequest, request: Request, background_tasks: BackgroundTasks):
+    """Выполняет несколько запросов к API за один HTTP-запрос.
+
+    Шаги выполняются по порядку; значения вида ${step_id.field} подставляются из
+    ответов предыдущих шагов. При atomic=true все шаги идут в одной транзакции:
+    первая ошибка (статус >= 400) останавливает пакет и откатывает изменения.
+    """
+    if len(batch.requests) > MAX_BATCH_SIZE:
+        raise HTTPException(status_code=400, detail=f"Batch is limited to {MAX_BATCH_SIZE} requests")
+    # Вложенный пакет умножал бы работу: запрещаем и прямо, и через подстановку пути
+    if batch_background.get() is not None or any(_is_batch_path(sub.path) for sub in batch.requests):
+        raise HTTPException(status_code=400, detail="Nested batch requests are not allowed")
+
+    connection = transaction = token = None
+    if batch.atomic:
+        # Коммиты эндпоинтов становятся точками сохранения внутри общей транзакции
+        connection = engine.connect()
+        transaction = connection.begin()
+        session = SessionLocal(bind=connection, join_transaction_mode="create_savepoint")
+        token = batch_session.set(session)
+
+    deferred: list = []
+    background_token = batch_background.set(deferred)
+    results: list[SubResponse] = []
+    bodies: dict[str, Any] = {}
+    failed = False
+    try:
+        for sub in batch.requests:
+            path = _resolve(sub.path, bodies)
+            query = _resolve(sub.query, bodies)
+            body = _resolve(sub.body, bodies)
+            if not isinstance(path, str):
+                status, response_body = 400, {"detail": "Batch step path must be a string"}
+            elif _is_batch_path(path):
+                status, response_body = 400, {"detail": "Nested batch requests are not allowed"}
+            else:
+                status, response_body = await _call(request, sub.method, path, query, body)
+            results.append(SubResponse(id=sub.id, status=status, body=response_body))
+            if sub.id:
+                bodies[sub.id] = response_body
+            if batch.atomic and status >= 400:
+                failed = True
+                break
+    except BaseException:
+        failed = True
+        raise
+    finally:
+        batch_background.reset(background_token)
+        if batch.atomic:
+            batch_session.reset(token)
+            session.close()
+            if failed:
+                transaction.rollback()
+            else:
+                transaction.commit()
+            connection.close()
+
+    # Фоновые задачи подзапросов выполняются после ответа на пакет
+    for work, args in deferred:
+        background_tasks.add_task(work, *args)
+    return BatchResponse(results=results, committed=not failed)
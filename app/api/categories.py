@@ -1,9 +1,17 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks
+from fastapi.responses import JSONResponse
+from sqlalchemy import func, delete
 from sqlalchemy.orm import Session
 from pydantic import BaseModel, ConfigDict
 from datetime import datetime
 from app.models.category import Category
-from app.database.db import get_db
+from app.models.task import Task
+from app.database.db import get_db, batch_session
+from app.database.replicas import replica_router
+from app.services.user_cache import user_cache
+from app.services.deletion_jobs import (
+    DeletionJobResponse, BACKGROUND_DELETE_THRESHOLD, start_job, schedule_job, get_job, delete_category_in_chunks
+)
 
 router = APIRouter()
 
@@ -29,9 +37,7 @@ class CategoryResponse(BaseModel):
 async def create_category(category: CategoryCreate, db: Session = Depends(get_db)):
     try:
         # Проверка существования пользователя
-        from app.models.user import User
-        user = db.query(User).filter(User.user_id == category.user_id).first()
-        if not user:
+        if not user_cache.user_exists(db, category.user_id):
             raise HTTPException(status_code=404, detail="User not found")
         
         # Проверка уникальности имени категории для пользователя
@@ -59,6 +65,14 @@ async def get_categories(user_id: int = None, db: Session = Depends(get_db)):
         return db.query(Category).filter(Category.user_id == user_id).all()
     return db.query(Category).all()
 
+@router.get("/deletion-jobs/{job_id}", response_model=DeletionJobResponse)
+async def get_category_deletion_job(job_id: str):
+    """Прогресс фонового удаления категории"""
+    job = get_job(job_id)
+    if not job or job["kind"] != "category":
+        raise HTTPException(status_code=404, detail="Deletion job not found")
+    return job
+
 @router.get("/{category_id}", response_model=CategoryResponse)
 async def get_category(category_id: int, db: Session = Depends(get_db)):
     category = db.query(Category).filter(Category.category_id == category_id).first()
@@ -85,6 +99,7 @@ async def update_category(category_id: int, category_update: CategoryUpdate, db:
         for key, value in category_update.model_dump(exclude_unset=True).items():
             setattr(category, key, value)
         db.commit()
+        replica_router.remember_write(category.user_id)
         db.refresh(category)
         return category
     except HTTPException:
@@ -94,13 +109,30 @@ async def update_category(category_id: int, category_update: CategoryUpdate, db:
         raise HTTPException(status_code=500, detail=f"Error updating category: {str(e)}")
 
 @router.delete("/{category_id}")
-async def delete_category(category_id: int, db: Session = Depends(get_db)):
+async def delete_category(category_id: int, background_tasks: BackgroundTasks, db: Session = Depends(get_db)):
     try:
-        category = db.query(Category).filter(Category.category_id == category_id).first()
-        if not category:
+        task_count = db.query(func.count(Task.task_id)).filter(Task.category_id == category_id).scalar()
+        if task_count >= BACKGROUND_DELETE_THRESHOLD:
+            # Категорию с большим числом задач отвязываем пачками в фоне
+            if batch_session.get() is not None:
+                # Фоновое задание ждало бы блокировок, которые держит транзакция пакета
+                raise HTTPException(status_code=409, detail="Large deletions cannot run inside an atomic batch")
+            job, created = start_job("category", category_id, task_count)
+            if created:
+                schedule_job(background_tasks, delete_category_in_chunks, job["job_id"], category_id)
+            return JSONResponse(status_code=202, content={
+                "message": "Category deletion started",
+                "job_id": job["job_id"]
+            })
+        
+        # category_id у задач обнуляет БД (ON DELETE SET NULL), без загрузки в сессию
+        owner_id = db.execute(
+            delete(Category).where(Category.category_id == category_id).returning(Category.user_id)
+        ).scalar()
+        if owner_id is None:
             raise HTTPException(status_code=404, detail="Category not found")
-        db.delete(category)
         db.commit()
+        replica_router.remember_write(owner_id)
         return {"message": "Category deleted"}
     except HTTPException:
         raise
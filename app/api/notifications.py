@@ -39,14 +39,18 @@ async def create_notification(notification: NotificationCreate, db: Session = De
         db.rollback()
         raise HTTPException(status_code=500, detail=f"Error creating notification: {str(e)}")
 
-@router.get("/", response_model=list[NotificationResponse])
-async def get_notifications(user_id: int = None, is_read: bool = None, db: Session = Depends(get_db)):
+def _notifications_query(db: Session, user_id: int | None, is_read: bool | None):
+    """Список уведомлений (индексы idx_notifications_user_sent / idx_notifications_user_read_sent)"""
     query = db.query(Notification)
     if user_id:
         query = query.filter(Notification.user_id == user_id)
     if is_read is not None:
         query = query.filter(Notification.is_read == is_read)
-    return query.order_by(Notification.sent_at.desc()).all()
+    return query.order_by(Notification.sent_at.desc())
+
+@router.get("/", response_model=list[NotificationResponse])
+async def get_notifications(user_id: int = None, is_read: bool = None, db: Session = Depends(get_db)):
+    return _notifications_query(db, user_id, is_read).all()
 
 @router.get("/{notification_id}", response_model=NotificationResponse)
 async def get_notification(notification_id: int, db: Session = Depends(get_db)):
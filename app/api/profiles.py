@@ -0,0 +1,53 @@
+from fastapi import APIRouter, Depends, HTTPException, Header
+from fastapi.responses import JSONResponse, Response
+from app.middleware.profiling import profile_store, PROFILER_TOKEN
+
+router = APIRouter()
+
+def require_profiler_token(x_profile: str | None = Header(default=None)):
+    """Профили доступны только с заголовком X-Profile, равным PROFILER_TOKEN"""
+    if not PROFILER_TOKEN:
+        # Без токена профили (с текстом SQL) никому не отдаем
+        raise HTTPException(status_code=404, detail="Not Found")
+    if x_profile != PROFILER_TOKEN:
+        raise HTTPException(status_code=403, detail="Profiler token required")
+
+def _get_profile(profile_id: str):
+    profile = profile_store.get(profile_id)
+    if not profile:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return profile
+
+@router.get("/", dependencies=[Depends(require_profiler_token)])
+async def get_profiles():
+    """Последние сохраненные профили запросов"""
+    return [
+        {key: value for key, value in profile.summary().items() if key != "sql"}
+        for profile in profile_store.list()
+    ]
+
+@router.get("/{profile_id}", dependencies=[Depends(require_profiler_token)])
+async def get_profile(profile_id: str):
+    """Сводка профиля с хронологией SQL-запросов"""
+    return _get_profile(profile_id).summary()
+
+@router.get("/{profile_id}/speedscope", dependencies=[Depends(require_profiler_token)])
+async def download_speedscope(profile_id: str):
+    """Профиль для https://www.speedscope.app"""
+    profile = _get_profile(profile_id)
+    return JSONResponse(
+        content=profile.to_speedscope(),
+        headers={"Content-Disposition": f'attachment; filename="{profile_id}.speedscope.json"'}
+    )
+
+@router.get("/{profile_id}/pstats", dependencies=[Depends(require_profiler_token)])
+async def download_pstats(profile_id: str):
+    """Профиль cProfile для pstats/snakeviz (только для X-Profile-Mode: cprofile)"""
+    profile = _get_profile(profile_id)
+    if profile.pstats_data is None:
+        raise HTTPException(status_code=404, detail="Profile was not recorded with cProfile")
+    return Response(
+        content=profile.pstats_data,
+        media_type="application/octet-stream",
+        headers={"Content-Disposition": f'attachment; filename="{profile_id}.pstats"'}
+    )
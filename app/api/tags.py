@@ -1,8 +1,11 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy import func, literal
 from sqlalchemy.orm import Session
 from pydantic import BaseModel, ConfigDict
 from datetime import datetime
 from app.models.tag import Tag
+from app.models.task import Task
+from app.models.task_tag import TaskTag
 from app.database.db import get_db
 
 router = APIRouter()
@@ -17,6 +20,35 @@ class TagResponse(BaseModel):
 
     model_config = ConfigDict(from_attributes=True)
 
+class TagSuggestion(BaseModel):
+    tag_id: int
+    name: str
+    usage_count: int
+
+def _suggest_query(db: Session, pattern: str, user_id: int | None, limit: int):
+    """Теги по шаблону LIKE, сначала самые используемые пользователем"""
+    if user_id is None:
+        # Без пользователя ранжировать не по чему, отдаем по алфавиту
+        return db.query(Tag.tag_id, Tag.name, literal(0)).filter(
+            Tag.name.like(pattern, escape="\\")
+        ).order_by(Tag.name).limit(limit)
+    
+    # Сколько раз пользователь использовал каждый подходящий тег (по его задачам).
+    # Префикс фильтруем внутри подзапроса: группируются только теги-кандидаты
+    usage = db.query(
+        TaskTag.tag_id.label("tag_id"),
+        func.count().label("usage_count")
+    ).join(Tag, Tag.tag_id == TaskTag.tag_id).join(Task, Task.task_id == TaskTag.task_id).filter(
+        Tag.name.like(pattern, escape="\\"), Task.user_id == user_id
+    ).group_by(TaskTag.tag_id).subquery()
+    
+    usage_count = func.coalesce(usage.c.usage_count, 0)
+    return db.query(Tag.tag_id, Tag.name, usage_count).outerjoin(
+        usage, usage.c.tag_id == Tag.tag_id
+    ).filter(
+        Tag.name.like(pattern, escape="\\")
+    ).order_by(usage_count.desc(), Tag.name).limit(limit)
+
 @router.post("/", response_model=TagResponse)
 async def create_tag(tag: TagCreate, db: Session = Depends(get_db)):
     try:
@@ -45,6 +77,22 @@ async def create_tag(tag: TagCreate, db: Session = Depends(get_db)):
 async def get_tags(db: Session = Depends(get_db)):
     return db.query(Tag).all()
 
+@router.get("/suggest", response_model=list[TagSuggestion])
+async def suggest_tags(
+    prefix: str = Query(..., min_length=1),
+    user_id: int | None = None,
+    limit: int = Query(10, ge=1, le=50),
+    db: Session = Depends(get_db)
+):
+    """Автодополнение тегов по префиксу, сначала самые используемые пользователем"""
+    normalized_prefix = prefix.strip().lower()
+    if not normalized_prefix:
+        return []
+    # Экранируем спецсимволы LIKE, чтобы префикс искался буквально (индекс idx_tags_name_prefix)
+    pattern = normalized_prefix.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+    rows = _suggest_query(db, pattern, user_id, limit).all()
+    return [TagSuggestion(tag_id=tag_id, name=name, usage_count=count) for tag_id, name, count in rows]
+
 @router.get("/{tag_id}", response_model=TagResponse)
 async def get_tag(tag_id: int, db: Session = Depends(get_db)):
     tag = db.query(Tag).filter(Tag.tag_id == tag_id).first()
@@ -5,6 +5,7 @@ from app.models.task_tag import TaskTag
 from app.models.task import Task
 from app.models.tag import Tag
 from app.database.db import get_db
+from app.database.replicas import replica_router
 
 router = APIRouter()
 
@@ -41,6 +42,8 @@ async def create_task_tag(task_tag: TaskTagCreate, db: Session = Depends(get_db)
         db_task_tag = TaskTag(task_id=task_tag.task_id, tag_id=task_tag.tag_id)
         db.add(db_task_tag)
         db.commit()
+        # user_id нет в запросе: теги задачи владелец читает с основной БД, пока реплики догоняют
+        replica_router.remember_write(task.user_id)
         db.refresh(db_task_tag)
         return db_task_tag
     except HTTPException:
@@ -49,12 +52,15 @@ async def create_task_tag(task_tag: TaskTagCreate, db: Session = Depends(get_db)
         db.rollback()
         raise HTTPException(status_code=500, detail=f"Error creating task-tag association: {str(e)}")
 
-@router.get("/", response_model=list[TaskTagResponse])
-async def get_task_tags(task_id: int | None = None, db: Session = Depends(get_db)):
+def _task_tags_query(db: Session, task_id: int | None):
     query = db.query(TaskTag)
     if task_id:
         query = query.filter(TaskTag.task_id == task_id)
-    return query.all()
+    return query
+
+@router.get("/", response_model=list[TaskTagResponse])
+async def get_task_tags(task_id: int | None = None, db: Session = Depends(get_db)):
+    return _task_tags_query(db, task_id).all()
 
 @router.get("/{task_id}/{tag_id}", response_model=TaskTagResponse)
 async def get_task_tag(task_id: int, tag_id: int, db: Session = Depends(get_db)):
@@ -69,8 +75,10 @@ async def delete_task_tag(task_id: int, tag_id: int, db: Session = Depends(get_d
         task_tag = db.query(TaskTag).filter(TaskTag.task_id == task_id, TaskTag.tag_id == tag_id).first()
         if not task_tag:
             raise HTTPException(status_code=404, detail="Task-Tag association not found")
+        owner_id = db.query(Task.user_id).filter(Task.task_id == task_id).scalar()
         db.delete(task_tag)
         db.commit()
+        replica_router.remember_write(owner_id)
         return {"message": "Task-Tag association deleted"}
     except HTTPException:
         raise
@@ -1,4 +1,9 @@
 from fastapi import APIRouter, Depends, HTTPException
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from sqlalchemy import select, insert, update, union_all, func, literal, case, cast, null, text, Text, DateTime
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 from pydantic import BaseModel, ConfigDict
 from datetime import datetime, timezone
@@ -6,7 +11,9 @@ from app.models.task import Task, PriorityEnum, StatusEnum
 from app.models.analytics_log import AnalyticsLog, ActionEnum
 from app.models.tag import Tag
 from app.models.task_tag import TaskTag
-from app.database.db import get_db
+from app.models.archived_task import ArchivedTask, ArchivedTaskTag
+from app.database.db import get_db, get_read_db
+from app.services.fieldsets import parse_fields
 
 router = APIRouter()
 
@@ -59,12 +66,7 @@ class TaskResponse(BaseModel):
     @classmethod
     def from_orm_with_tags(cls, task: Task, db: Session):
         """Создает TaskResponse с загруженными тегами"""
-        task_tags = db.query(TaskTag).filter(TaskTag.task_id == task.task_id).all()
-        tags = []
-        for task_tag in task_tags:
-            tag = db.query(Tag).filter(Tag.tag_id == task_tag.tag_id).first()
-            if tag:
-                tags.append(TagInfo(tag_id=tag.tag_id, name=tag.name))
+        tags = _tags_by_task(db, TaskTag, [task.task_id]).get(task.task_id, [])
         
         task_dict = {
             "task_id": task.task_id,
@@ -85,24 +87,54 @@ class TaskResponse(BaseModel):
         }
         return cls(**task_dict)
 
+def _tags_json(task_id_column):
+    """Подзапрос: теги задачи одним JSON-массивом"""
+    return select(
+        func.coalesce(
+            func.json_agg(func.json_build_object("tag_id", Tag.tag_id, "name", Tag.name)),
+            text("'[]'::json")
+        )
+    ).select_from(TaskTag).join(Tag, Tag.tag_id == TaskTag.tag_id).where(
+        TaskTag.task_id == task_id_column
+    ).scalar_subquery()
+
+def _tasks_query(db: Session, model, user_id: int):
+    """Задачи пользователя (model — Task или ArchivedTask)"""
+    return db.query(model).filter(model.user_id == user_id)
+
+def _tags_query(db: Session, link_model, task_ids):
+    """Пары (task_id, tag_id, name) для группы задач"""
+    return db.query(link_model.task_id, Tag.tag_id, Tag.name).join(
+        Tag, Tag.tag_id == link_model.tag_id
+    ).filter(link_model.task_id.in_(task_ids))
+
+def _tags_by_task(db: Session, link_model, task_ids) -> dict[int, list[dict]]:
+    """Теги группы задач одним запросом: {task_id: [{tag_id, name}, ...]}"""
+    tags_by_task = {}
+    rows = _tags_query(db, link_model, task_ids).all()
+    for task_id, tag_id, name in rows:
+        tags_by_task.setdefault(task_id, []).append({"tag_id": tag_id, "name": name})
+    return tags_by_task
+
+def _raise_for_integrity_error(e: IntegrityError):
+    """Переводит нарушение внешнего ключа в 404"""
+    diag = getattr(e.orig, "diag", None)
+    constraint = getattr(diag, "constraint_name", None) or str(e.orig)
+    if "category_id" in constraint:
+        raise HTTPException(status_code=404, detail="Category not found")
+    if "user_id" in constraint:
+        raise HTTPException(status_code=404, detail="User not found")
+    raise HTTPException(status_code=400, detail=f"Integrity error: {str(e.orig)}")
+
 @router.post("/", response_model=TaskResponse)
 async def create_task(task: TaskCreate, user_id: int = 1, db:
                       Session = Depends(get_db)):
     try:
-        # Проверка существования пользователя
-        from app.models.user import User
-        user = db.query(User).filter(User.user_id == user_id).first()
-        if not user:
-            raise HTTPException(status_code=404, detail="User not found")
-        
-        # Проверка существования категории, если указана
-        if task.category_id:
-            from app.models.category import Category
-            category = db.query(Category).filter(Category.category_id == task.category_id).first()
-            if not category:
-                raise HTTPException(status_code=404, detail="Category not found")
+        now = datetime.now(timezone.utc)
         
-        db_task = Task(
+        # Вставка задачи и аналитического лога одним запросом (CTE).
+        # Существование пользователя и категории проверяют внешние ключи.
+        new_task = insert(Task).values(
             user_id=user_id,
             title=task.title,
             description=task.description,
@@ -112,35 +144,83 @@ async def create_task(task: TaskCreate, user_id: int = 1, db:
             is_repeating=task.is_repeating,
             repeat_interval=task.repeat_interval,
             status=StatusEnum.active.value,
-            is_favorite=task.is_favorite
-        )
-        db.add(db_task)
-        db.commit()
-        db.refresh(db_task)
+            is_favorite=task.is_favorite,
+            created_at=now,
+            updated_at=now
+        ).returning(*Task.__table__.c).cte("new_task")
         
         # Уведомление о просрочке создается автоматически триггером БД
         
-        # Создание аналитического лога
-        analytics_log = AnalyticsLog(
-            user_id=user_id,
-            task_id=db_task.task_id,
-            action=ActionEnum.created.value,
-            details={"title": db_task.title, "priority": db_task.priority, "deadline": str(db_task.deadline) if db_task.deadline else None}
-        )
-        db.add(analytics_log)
+        new_log = insert(AnalyticsLog).from_select(
+            ["user_id", "task_id", "action", "timestamp", "details"],
+            select(
+                new_task.c.user_id,
+                new_task.c.task_id,
+                literal(ActionEnum.created.value),
+                literal(now, DateTime),
+                func.jsonb_build_object(
+                    "title", new_task.c.title,
+                    "priority", new_task.c.priority,
+                    "deadline", cast(new_task.c.deadline, Text)
+                )
+            )
+        ).cte("new_log")
+        
+        row = db.execute(select(new_task).add_cte(new_log)).mappings().one()
         db.commit()
         
-        return TaskResponse.from_orm_with_tags(db_task, db)
+        return TaskResponse(**row, tags=[])
     except HTTPException:
         raise
+    except IntegrityError as e:
+        db.rollback()
+        _raise_for_integrity_error(e)
     except Exception as e:
         db.rollback()
         raise HTTPException(status_code=500, detail=f"Error creating task: {str(e)}")
 
 @router.get("/", response_model=list[TaskResponse])
-async def get_tasks(user_id: int = 1, db: Session = Depends(get_db)):
-    tasks = db.query(Task).filter(Task.user_id == user_id).all()
-    return [TaskResponse.from_orm_with_tags(task, db) for task in tasks]
+async def get_tasks(user_id: int = 1, fields: str | None = None, include_archived: bool = False,
+                    db: Session = Depends(get_read_db)):
+    selected = parse_fields(fields, TaskResponse, always=("task_id",))
+    if selected is None:
+        # Теги загружаются одним запросом на таблицу, а не по запросу на задачу
+        sources = [(Task, TaskTag)] + ([(ArchivedTask, ArchivedTaskTag)] if include_archived else [])
+        result = []
+        for model, link_model in sources:
+            tasks = _tasks_query(db, model, user_id).all()
+            tags_by_task = _tags_by_task(db, link_model, select(model.task_id).where(model.user_id == user_id))
+            result += [
+                TaskResponse(
+                    **{column.name: getattr(task, column.name) for column in Task.__table__.c},
+                    tags=tags_by_task.get(task.task_id, [])
+                )
+                for task in tasks
+            ]
+        return result
+    
+    # Выбираем из БД только запрошенные колонки
+    columns = [name for name in selected if name != "tags"]
+    query = select(*[Task.__table__.c[name] for name in columns]).where(Task.user_id == user_id)
+    if include_archived:
+        query = union_all(
+            query,
+            select(*[ArchivedTask.__table__.c[name] for name in columns]).where(ArchivedTask.user_id == user_id)
+        )
+    items = [dict(row._mapping) for row in db.execute(query).all()]
+    
+    if "tags" in selected:
+        # Теги всех задач пользователя одним запросом на таблицу
+        tags_by_task = _tags_by_task(db, TaskTag, select(Task.task_id).where(Task.user_id == user_id))
+        if include_archived:
+            tags_by_task.update(_tags_by_task(
+                db, ArchivedTaskTag, select(ArchivedTask.task_id).where(ArchivedTask.user_id == user_id)
+            ))
+        for item in items:
+            item["tags"] = tags_by_task.get(item["task_id"], [])
+    
+    # Частичный ответ не проходит через response_model
+    return JSONResponse(content=jsonable_encoder(items))
 
 @router.get("/{task_id}", response_model=TaskResponse)
 async def get_task(task_id: int, user_id: int = 1, db: Session = Depends(get_db)):
@@ -152,59 +232,79 @@ async def get_task(task_id: int, user_id: int = 1, db: Session = Depends(get_db)
 @router.put("/{task_id}", response_model=TaskResponse)
 async def update_task(task_id: int, task_update: TaskUpdate, user_id: int = 1, db: Session = Depends(get_db)):
     try:
-        task = db.query(Task).filter(Task.task_id == task_id, Task.user_id == user_id).first()
-        if not task:
-            raise HTTPException(status_code=404, detail="Task not found")
-        
-        # Проверка существования категории, если указана
-        if task_update.category_id is not None:
-            from app.models.category import Category
-            category = db.query(Category).filter(Category.category_id == task_update.category_id).first()
-            if not category:
-                raise HTTPException(status_code=404, detail="Category not found")
+        now = datetime.now(timezone.utc)
+        updated_fields = task_update.model_dump(exclude_unset=True)
         
-        old_status = task.status
-        for key, value in task_update.model_dump(exclude_unset=True).items():
+        values = {}
+        for key, value in updated_fields.items():
             # Преобразуем Enum в строку для сохранения в БД
             if key in ('priority', 'status') and value is not None:
                 value = value.value if hasattr(value, 'value') else value
-            setattr(task, key, value)
+            values[key] = value
+        values["updated_at"] = now
         
-        # Устанавливаем completed_at при выполнении задачи
-        if task_update.status and task.status == StatusEnum.completed.value and old_status != StatusEnum.completed.value:
-            task.completed_at = datetime.now(timezone.utc)
-        # Сбрасываем completed_at при отмене выполнения
-        elif task_update.status and task.status != StatusEnum.completed.value and old_status == StatusEnum.completed.value:
-            task.completed_at = None
+        # Старый статус читаем в том же запросе, блокируя строку задачи
+        old = select(Task.task_id, Task.status.label("old_status")).where(
+            Task.task_id == task_id, Task.user_id == user_id
+        ).with_for_update().subquery("old")
         
-        task.updated_at = datetime.now(timezone.utc)
-        db.commit()
-        db.refresh(task)
+        new_status = values.get("status")
+        completed = StatusEnum.completed.value
+        became_completed = old.c.old_status.is_distinct_from(completed)
+        if new_status == completed:
+            # Устанавливаем completed_at при выполнении задачи
+            values["completed_at"] = case((became_completed, literal(now, DateTime)), else_=Task.completed_at)
+        elif new_status:
+            # Сбрасываем completed_at при отмене выполнения
+            values["completed_at"] = case((old.c.old_status == completed, null()), else_=Task.completed_at)
+        
+        updated_task = update(Task).where(Task.task_id == old.c.task_id).values(**values).returning(
+            *Task.__table__.c, old.c.old_status
+        ).cte("updated_task")
         
         # Уведомление о просрочке создается автоматически триггером БД
         
         # Определяем тип действия для аналитики
-        action_type = ActionEnum.updated
-        if task_update.status and task.status == StatusEnum.completed.value and old_status != StatusEnum.completed.value:
-            action_type = ActionEnum.completed
+        if new_status == completed:
+            action = case(
+                (updated_task.c.old_status.is_distinct_from(completed), ActionEnum.completed.value),
+                else_=ActionEnum.updated.value
+            )
+        else:
+            action = literal(ActionEnum.updated.value)
         
-        # Создание аналитического лога
-        analytics_log = AnalyticsLog(
-            user_id=user_id,
-            task_id=task.task_id,
-            action=action_type.value,
-            details={
-                "updated_fields": list(task_update.model_dump(exclude_unset=True).keys()),
-                "old_status": old_status,
-                "new_status": task.status
-            }
-        )
-        db.add(analytics_log)
+        new_log = insert(AnalyticsLog).from_select(
+            ["user_id", "task_id", "action", "timestamp", "details"],
+            select(
+                updated_task.c.user_id,
+                updated_task.c.task_id,
+                action,
+                literal(now, DateTime),
+                func.jsonb_build_object(
+                    "updated_fields", literal(list(updated_fields.keys()), JSONB),
+                    "old_status", updated_task.c.old_status,
+                    "new_status", updated_task.c.status
+                )
+            )
+        ).cte("new_log")
+        
+        row = db.execute(
+            select(
+                *[updated_task.c[column.name] for column in Task.__table__.c],
+                _tags_json(updated_task.c.task_id).label("tags")
+            ).add_cte(new_log)
+        ).mappings().first()
+        if not row:
+            db.rollback()
+            raise HTTPException(status_code=404, detail="Task not found")
         db.commit()
         
-        return TaskResponse.from_orm_with_tags(task, db)
+        return TaskResponse(**row)
     except HTTPException:
         raise
+    except IntegrityError as e:
+        db.rollback()
+        _raise_for_integrity_error(e)
     except Exception as e:
         db.rollback()
         raise HTTPException(status_code=500, detail=f"Error updating task: {str(e)}")
@@ -1,10 +1,23 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from sqlalchemy import func, literal, update
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import Session
 from pydantic import BaseModel, ConfigDict
 from datetime import datetime, timezone
 from app.models.user import User
-from app.database.db import get_db
-import hashlib
+from app.models.user_task_summary import UserTaskSummary
+from app.models.task import Task, StatusEnum
+from app.database.db import get_db, batch_session
+from app.services.fieldsets import parse_fields
+from app.services.deletion_jobs import (
+    DeletionJobResponse, BACKGROUND_DELETE_THRESHOLD, start_job, schedule_job, get_job, delete_user_in_chunks
+)
+from app.services.passwords import (
+    DUMMY_HASH, verify_password_async, hash_password_async, hash_client_digest_async, needs_rehash
+)
+from app.services.user_cache import user_cache
 
 router = APIRouter()
 
@@ -34,22 +47,33 @@ class UserResponse(BaseModel):
 
     model_config = ConfigDict(from_attributes=True)
 
+class UserSummaryResponse(BaseModel):
+    user_id: int
+    total: int
+    by_status: dict[str, int]
+    by_priority: dict[str, int]
+    by_category: dict[str, int]
+    favorites: int
+    next_deadline: datetime | None = None
+
 @router.post("/login", response_model=UserResponse)
 async def login_user(login: LoginRequest, db: Session = Depends(get_db)):
     """Авторизация пользователя по email и паролю"""
     try:
         # Находим пользователя по email
         db_user = db.query(User).filter(User.email == login.email).first()
-        if not db_user:
-            raise HTTPException(status_code=401, detail="Неверный email или пароль")
         
-        # Хэшируем введенный пароль
-        password_hash = hashlib.sha256(login.password.encode()).hexdigest()
-        
-        # Сравниваем хэши
-        if db_user.password_hash != password_hash:
+        # Проверяем пароль в пуле потоков, чтобы не блокировать event loop.
+        # Для неизвестного email считаем scrypt от DUMMY_HASH, чтобы время ответа не выдавало аккаунт
+        stored_hash = db_user.password_hash if db_user else DUMMY_HASH
+        password_ok = await verify_password_async(login.password, stored_hash)
+        if not db_user or not password_ok:
             raise HTTPException(status_code=401, detail="Неверный email или пароль")
         
+        # Прозрачно переводим старый SHA-256 хэш на scrypt
+        if needs_rehash(db_user.password_hash):
+            db_user.password_hash = await hash_password_async(login.password)
+        
         # Обновляем время последнего входа
         db_user.last_login = datetime.now(timezone.utc)
         db.commit()
@@ -68,7 +92,9 @@ async def create_user(user: UserCreate, db: Session = Depends(get_db)):
         db_user = db.query(User).filter(User.email == user.email).first()
         if db_user:
             raise HTTPException(status_code=400, detail="Email already registered")
-        db_user = User(**user.model_dump())
+        # Фронтенд присылает SHA-256 пароля: сохраняем сразу в scrypt, а не в старом формате
+        db_user = User(**user.model_dump(exclude={"password_hash"}),
+                       password_hash=await hash_client_digest_async(user.password_hash))
         db.add(db_user)
         db.commit()
         db.refresh(db_user)
@@ -80,8 +106,15 @@ async def create_user(user: UserCreate, db: Session = Depends(get_db)):
         raise HTTPException(status_code=500, detail=f"Error creating user: {str(e)}")
 
 @router.get("/", response_model=list[UserResponse])
-async def get_users(db: Session = Depends(get_db)):
-    return db.query(User).all()
+async def get_users(fields: str | None = None, db: Session = Depends(get_db)):
+    selected = parse_fields(fields, UserResponse, always=("user_id",))
+    if selected is None:
+        return db.query(User).all()
+    
+    # Выбираем из БД только запрошенные колонки, частичный ответ не проходит через response_model
+    columns = [getattr(User, name) for name in selected]
+    items = [dict(row._mapping) for row in db.query(*columns).all()]
+    return JSONResponse(content=jsonable_encoder(items))
 
 @router.get("/{user_id}", response_model=UserResponse)
 async def get_user(user_id: int, db: Session = Depends(get_db)):
@@ -96,9 +129,13 @@ async def update_user(user_id: int, user_update: UserUpdate, db: Session = Depen
         user = db.query(User).filter(User.user_id == user_id).first()
         if not user:
             raise HTTPException(status_code=404, detail="User not found")
-        for key, value in user_update.model_dump(exclude_unset=True).items():
+        changes = user_update.model_dump(exclude_unset=True)
+        if changes.get("password_hash") is not None:
+            changes["password_hash"] = await hash_client_digest_async(changes["password_hash"])
+        for key, value in changes.items():
             setattr(user, key, value)
         db.commit()
+        user_cache.invalidate(user_id)
         db.refresh(user)
         return user
     except HTTPException:
@@ -111,26 +148,20 @@ async def update_user(user_id: int, user_update: UserUpdate, db: Session = Depen
 async def update_preferences(user_id: int, preferences_update: PreferencesUpdate, db: Session = Depends(get_db)):
     """Обновление настроек пользователя"""
     try:
-        user = db.query(User).filter(User.user_id == user_id).first()
+        # Слияние JSONB (||) в одном UPDATE: без чтения строки и без потери параллельных изменений
+        user = db.execute(
+            update(User)
+            .where(User.user_id == user_id)
+            .values(preferences=func.coalesce(User.preferences, literal({}, JSONB)).op("||")(
+                literal(preferences_update.preferences, JSONB)
+            ))
+            .returning(User)
+            .execution_options(synchronize_session=False)
+        ).scalar_one_or_none()
         if not user:
             raise HTTPException(status_code=404, detail="User not found")
-        
-        # Объединяем существующие настройки с новыми (создаем новый словарь)
-        # JSONB может быть dict или другим типом, поэтому конвертируем явно
-        if user.preferences:
-            if isinstance(user.preferences, dict):
-                current_prefs = user.preferences.copy()
-            else:
-                current_prefs = dict(user.preferences)
-        else:
-            current_prefs = {}
-        
-        # Объединяем настройки
-        new_prefs = {**current_prefs, **preferences_update.preferences}
-        user.preferences = new_prefs
-        
         db.commit()
-        db.refresh(user)
+        user_cache.invalidate(user_id)
         return user
     except HTTPException:
         raise
@@ -141,19 +172,84 @@ async def update_preferences(user_id: int, preferences_update: PreferencesUpdate
 @router.get("/{user_id}/preferences")
 async def get_preferences(user_id: int, db: Session = Depends(get_db)):
     """Получение настроек пользователя"""
-    user = db.query(User).filter(User.user_id == user_id).first()
-    if not user:
+    preferences = user_cache.get_preferences(db, user_id)
+    if preferences is None:
         raise HTTPException(status_code=404, detail="User not found")
-    return {"preferences": user.preferences or {}}
+    return {"preferences": preferences}
+
+@router.get("/{user_id}/summary", response_model=UserSummaryResponse)
+async def get_user_summary(user_id: int, db: Session = Depends(get_db)):
+    """Сводка по задачам пользователя из таблицы user_task_summary"""
+    summary = db.query(UserTaskSummary).filter(UserTaskSummary.user_id == user_id).first()
+    if not summary:
+        # Строки нет, если у пользователя еще не было задач
+        if not user_cache.user_exists(db, user_id):
+            raise HTTPException(status_code=404, detail="User not found")
+        summary = UserTaskSummary(
+            user_id=user_id, total_count=0, active_count=0, in_progress_count=0,
+            completed_count=0, overdue_count=0, high_priority_count=0,
+            medium_priority_count=0, low_priority_count=0, favorite_count=0,
+            category_counts={}
+        )
+    
+    # Ближайший дедлайн по частичному индексу idx_tasks_user_open_deadline
+    next_deadline = db.query(Task.deadline).filter(
+        Task.user_id == user_id,
+        Task.status.in_([StatusEnum.active.value, StatusEnum.in_progress.value]),
+        Task.deadline >= datetime.now(timezone.utc)
+    ).order_by(Task.deadline).limit(1).scalar()
+    
+    return UserSummaryResponse(
+        user_id=user_id,
+        total=summary.total_count,
+        by_status={
+            StatusEnum.active.value: summary.active_count,
+            StatusEnum.in_progress.value: summary.in_progress_count,
+            StatusEnum.completed.value: summary.completed_count,
+            StatusEnum.overdue.value: summary.overdue_count,
+        },
+        by_priority={
+            "high": summary.high_priority_count,
+            "medium": summary.medium_priority_count,
+            "low": summary.low_priority_count,
+        },
+        by_category=summary.category_counts or {},
+        favorites=summary.favorite_count,
+        next_deadline=next_deadline
+    )
+
+@router.get("/deletion-jobs/{job_id}", response_model=DeletionJobResponse)
+async def get_user_deletion_job(job_id: str):
+    """Прогресс фонового удаления пользователя"""
+    job = get_job(job_id)
+    if not job or job["kind"] != "user":
+        raise HTTPException(status_code=404, detail="Deletion job not found")
+    return job
 
 @router.delete("/{user_id}")
-async def delete_user(user_id: int, db: Session = Depends(get_db)):
+async def delete_user(user_id: int, background_tasks: BackgroundTasks, db: Session = Depends(get_db)):
     try:
-        user = db.query(User).filter(User.user_id == user_id).first()
-        if not user:
+        task_count = db.query(func.count(Task.task_id)).filter(Task.user_id == user_id).scalar()
+        if task_count >= BACKGROUND_DELETE_THRESHOLD:
+            # Большой аккаунт удаляем пачками в фоне
+            if batch_session.get() is not None:
+                # Фоновое задание ждало бы блокировок, которые держит транзакция пакета
+                raise HTTPException(status_code=409, detail="Large deletions cannot run inside an atomic batch")
+            job, created = start_job("user", user_id, task_count)
+            user_cache.invalidate(user_id)
+            if created:
+                schedule_job(background_tasks, delete_user_in_chunks, job["job_id"], user_id)
+            return JSONResponse(status_code=202, content={
+                "message": "User deletion started",
+                "job_id": job["job_id"]
+            })
+        
+        # Связанные строки удаляет каскад в БД, без загрузки в сессию
+        deleted = db.query(User).filter(User.user_id == user_id).delete(synchronize_session=False)
+        if not deleted:
             raise HTTPException(status_code=404, detail="User not found")
-        db.delete(user)
         db.commit()
+        user_cache.invalidate(user_id)
         return {"message": "User deleted"}
     except HTTPException:
         raise
@@ -0,0 +1,91 @@
+import itertools
+import os
+import threading
+import time
+from sqlalchemy import create_engine, text
+from sqlalchemy.engine import Engine
+
+# Реплики для чтения через запятую; пусто — все запросы идут на основную БД.
+# Для локальной проверки можно указать второй экземпляр Postgres или тот же DATABASE_URL.
+REPLICA_URLS = [url.strip() for url in os.getenv("DATABASE_REPLICA_URLS", "").split(",") if url.strip()]
+MAX_REPLICA_LAG = float(os.getenv("MAX_REPLICA_LAG", 5.0))
+REPLICA_CHECK_INTERVAL = float(os.getenv("REPLICA_CHECK_INTERVAL", 5.0))
+REPLICA_CONNECT_TIMEOUT = int(os.getenv("REPLICA_CONNECT_TIMEOUT", 2))
+# Сколько секунд после записи пользователь читает с основной БД (read-your-writes).
+# Отметки о записях хранятся в памяти процесса: при нескольких воркерах uvicorn
+# чтение на другом воркере их не видит и может вернуть данные реплики до записи.
+READ_YOUR_WRITES_SECONDS = float(os.getenv("READ_YOUR_WRITES_SECONDS", 10.0))
+
+LAG_QUERY = text("""
+    SELECT COALESCE(
+        CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+             ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp())
+        END, 0)
+""")
+
+class _Replica:
+    def __init__(self, url: str):
+        # Недоступная реплика не должна держать запрос дольше таймаута подключения
+        self.engine = create_engine(url, pool_pre_ping=True, connect_args={"connect_timeout": REPLICA_CONNECT_TIMEOUT})
+        self.lag: float | None = None
+        self.checked_at = 0.0
+
+class ReplicaRouter:
+    """Выбор реплики для чтения с учетом отставания и недавних записей пользователя"""
+
+    def __init__(self, urls: list[str] = REPLICA_URLS, max_lag: float = MAX_REPLICA_LAG,
+                 check_interval: float = REPLICA_CHECK_INTERVAL, sticky_seconds: float = READ_YOUR_WRITES_SECONDS):
+        self.replicas = [_Replica(url) for url in urls]
+        self.max_lag = max_lag
+        self.check_interval = check_interval
+        self.sticky_seconds = sticky_seconds
+        self._round_robin = itertools.count()
+        self._last_writes: dict[int, float] = {}
+        self._lock = threading.Lock()
+
+    def remember_write(self, user_id: int | None):
+        if user_id is None:
+            return
+        with self._lock:
+            self._last_writes[user_id] = time.monotonic()
+            # Не даем словарю расти: выбрасываем истекшие отметки
+            if len(self._last_writes) > 10000:
+                deadline = time.monotonic() - self.sticky_seconds
+                self._last_writes = {uid: at for uid, at in self._last_writes.items() if at > deadline}
+
+    def _recently_wrote(self, user_id: int | None) -> bool:
+        if user_id is None:
+            return False
+        with self._lock:
+            written_at = self._last_writes.get(user_id)
+        return written_at is not None and time.monotonic() - written_at < self.sticky_seconds
+
+    def _lag(self, replica: _Replica) -> float | None:
+        now = time.monotonic()
+        with self._lock:
+            due = now - replica.checked_at >= self.check_interval
+            if due:
+                # Проверку выполняет один поток, остальные пока берут прошлое значение
+                replica.checked_at = now
+        if due:
+            try:
+                with replica.engine.connect() as connection:
+                    replica.lag = float(connection.execute(LAG_QUERY).scalar() or 0)
+            except Exception:
+                # Недоступная реплика считается отставшей до следующей проверки
+                replica.lag = None
+        return replica.lag
+
+    def choose(self, user_id: int | None = None) -> Engine | None:
+        """Движок реплики или None, если читать нужно с основной БД"""
+        if not self.replicas or self._recently_wrote(user_id):
+            return None
+        start = next(self._round_robin)
+        for offset in range(len(self.replicas)):
+            replica = self.replicas[(start + offset) % len(self.replicas)]
+            lag = self._lag(replica)
+            if lag is not None and lag <= self.max_lag:
+                return replica.engine
+        return None
+
+replica_router = ReplicaRouter()
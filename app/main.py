@@ -1,6 +1,11 @@
+import asyncio
+from contextlib import asynccontextmanager, suppress
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.database.db import Base, engine
+from app.middleware.compression import CompressionMiddleware
+from app.middleware.admission import AdmissionMiddleware, AdmissionController
+from app.middleware.profiling import ProfilingMiddleware
 
 from app.models.user import User 
 from app.models.category import Category   
@@ -9,15 +14,36 @@ from app.models.tag import Tag
 from app.models.task_tag import TaskTag
 from app.models.analytics_log import AnalyticsLog
 from app.models.notification import Notification
+from app.models.user_task_summary import UserTaskSummary
+from app.models.archived_task import ArchivedTask, ArchivedTaskTag
+from app.services.archiver import run_archiver, ARCHIVE_INTERVAL_SECONDS
 
-from app.api import tasks, users, categories, tags, task_tags, notifications, analytics_logs
+from app.api import tasks, users, categories, tags, task_tags, notifications, analytics_logs, profiles, batch
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Фоновая архивация завершенных задач (ARCHIVE_INTERVAL_SECONDS=0 отключает)
+    archiver = asyncio.create_task(run_archiver()) if ARCHIVE_INTERVAL_SECONDS > 0 else None
+    yield
+    if archiver:
+        archiver.cancel()
+        with suppress(asyncio.CancelledError):
+            await archiver
 
 app = FastAPI(
     title= "MasterTask API",
     description= "REST API для управления задачами, пользователями, категориями и аналитикой",
-    version= "1.0.0"
+    version= "1.0.0",
+    lifespan=lifespan
 )
 
+# Профилирование по запросу; ближе всех к приложению, чтобы не учитывать ожидание в очереди
+app.add_middleware(ProfilingMiddleware)
+
+# Ограничение конкурентности к БД; подключается первым, чтобы 503 получали CORS-заголовки
+admission = AdmissionController()
+app.add_middleware(AdmissionMiddleware, controller=admission)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["http://localhost:5173"],
@@ -26,6 +52,8 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+app.add_middleware(CompressionMiddleware)
+
 Base.metadata.create_all(bind=engine)
 
 app.include_router(tasks.router, prefix="/tasks", tags=["tasks"])
@@ -35,11 +63,18 @@ app.include_router(tags.router, prefix="/tags", tags=["tags"])
 app.include_router(task_tags.router, prefix="/task-tags", tags=["task_tags"])
 app.include_router(notifications.router, prefix="/notifications", tags=["notifications"])
 app.include_router(analytics_logs.router, prefix="/analytics-logs", tags=["analytics_logs"])
+app.include_router(profiles.router, prefix="/profiles", tags=["profiles"])
+app.include_router(batch.router, prefix="/batch", tags=["batch"])
 
 @app.get("/api/hello")
 def hello():
     return {"message": "Привет от FastAPI!"}
 
+@app.get("/metrics/admission", tags=["root"])
+async def admission_metrics():
+    """Счетчики пропущенных и отклоненных запросов по маршрутам"""
+    return admission.stats()
+
 @app.get("/", tags=["root"])
 async def root():
     return {"message": "MasterTask API is running. Visit /docs for Swagger UI"}
\ No newline at end of file
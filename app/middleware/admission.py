@@ -0,0 +1,233 @@
+import asyncio
+import itertools
+import os
+from dataclasses import dataclass
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+# Сколько запросов одновременно может работать с БД (pool_size + max_overflow движка)
+DB_CAPACITY = int(os.getenv("ADMISSION_DB_CAPACITY", 15))
+# Слоты, которые держим только для дешевых запросов с высоким приоритетом
+RESERVED_FOR_HIGH_PRIORITY = int(os.getenv("ADMISSION_RESERVED_SLOTS", 3))
+QUEUE_TIMEOUT = float(os.getenv("ADMISSION_QUEUE_TIMEOUT", 2.0))
+RETRY_AFTER_SECONDS = int(os.getenv("ADMISSION_RETRY_AFTER", 1))
+
+HIGH, NORMAL, LOW = 0, 1, 2
+
+@dataclass
+class RoutePolicy:
+    prefix: str
+    priority: int
+    max_concurrency: int
+    max_queue: int
+    # False — только лимит маршрута, без слота в общей емкости БД
+    global_slot: bool = True
+
+DEFAULT_POLICIES = [
+    RoutePolicy("/notifications", HIGH, max_concurrency=DB_CAPACITY, max_queue=50),
+    RoutePolicy("/tasks", NORMAL, max_concurrency=10, max_queue=30),
+    RoutePolicy("/users", NORMAL, max_concurrency=6, max_queue=20),
+    RoutePolicy("/categories", NORMAL, max_concurrency=4, max_queue=20),
+    RoutePolicy("/tags", NORMAL, max_concurrency=4, max_queue=20),
+    RoutePolicy("/task-tags", NORMAL, max_concurrency=4, max_queue=20),
+    RoutePolicy("/analytics-logs", LOW, max_concurrency=3, max_queue=5),
+    # Подзапросы пакета сами занимают слоты БД и проходят лимиты своих маршрутов
+    RoutePolicy("/batch", NORMAL, max_concurrency=4, max_queue=10, global_slot=False),
+]
+
+class _Waiter:
+    def __init__(self, prefix: str, priority: int, cap: int, seq: int):
+        self.prefix = prefix
+        self.priority = priority
+        self.cap = cap
+        self.seq = seq
+        self.future = asyncio.get_running_loop().create_future()
+
+class _Limiter:
+    """Счетчик слотов с ожиданием по приоритету.
+
+    cap ограничивает, сколько слотов может быть занято, чтобы запрос вошел:
+    так запросам с низким приоритетом не достаются зарезервированные слоты.
+    """
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.in_use = 0
+        self.waiters: list[_Waiter] = []
+        self._seq = itertools.count()
+
+    def try_acquire(self, cap: int) -> bool:
+        if self.in_use < min(cap, self.capacity) and not self.waiters:
+            self.in_use += 1
+            return True
+        return False
+
+    def queued(self, prefix: str) -> int:
+        return sum(1 for waiter in self.waiters if waiter.prefix == prefix)
+
+    def enqueue(self, prefix: str, priority: int, cap: int) -> _Waiter:
+        waiter = _Waiter(prefix, priority, min(cap, self.capacity), next(self._seq))
+        self.waiters.append(waiter)
+        self.waiters.sort(key=lambda w: (w.priority, w.seq))
+        # Свободный слот мог быть недоступен только ожидающим с меньшим cap
+        self._wake()
+        return waiter
+
+    def cancel(self, waiter: _Waiter):
+        if waiter in self.waiters:
+            self.waiters.remove(waiter)
+        elif waiter.future.done() and not waiter.future.cancelled():
+            # Слот уже был передан, но ожидание истекло: возвращаем его
+            self.release()
+
+    def release(self):
+        self.in_use -= 1
+        self._wake()
+
+    def _wake(self):
+        for waiter in list(self.waiters):
+            if self.in_use >= self.capacity:
+                break
+            if self.in_use < waiter.cap:
+                self.waiters.remove(waiter)
+                self.in_use += 1
+                waiter.future.set_result(True)
+
+class AdmissionController:
+    """Ограничение конкурентности по маршрутам с общей емкостью БД и приоритетами"""
+
+    def __init__(self, policies: list[RoutePolicy] = DEFAULT_POLICIES, capacity: int = DB_CAPACITY,
+                 reserved_for_high: int = RESERVED_FOR_HIGH_PRIORITY, queue_timeout: float = QUEUE_TIMEOUT):
+        # Длинные префиксы проверяем первыми (/task-tags раньше /tasks)
+        self.policies = sorted(policies, key=lambda p: len(p.prefix), reverse=True)
+        self.capacity = capacity
+        self.reserved_for_high = reserved_for_high
+        self.queue_timeout = queue_timeout
+        self._global: _Limiter | None = None
+        self._routes: dict[str, _Limiter] = {}
+        self._stats = {
+            policy.prefix: {"admitted": 0, "queued": 0, "shed_queue_full": 0, "shed_timeout": 0}
+            for policy in policies
+        }
+
+    def match(self, path: str) -> RoutePolicy | None:
+        for policy in self.policies:
+            if path == policy.prefix or path.startswith(policy.prefix + "/"):
+                return policy
+        return None
+
+    def _limiters(self, policy: RoutePolicy) -> tuple[_Limiter, _Limiter]:
+        # Создаем лениво, чтобы примитивы asyncio относились к рабочему event loop
+        if self._global is None:
+            self._global = _Limiter(self.capacity)
+        if policy.prefix not in self._routes:
+            self._routes[policy.prefix] = _Limiter(policy.max_concurrency)
+        return self._routes[policy.prefix], self._global
+
+    def _global_cap(self, policy: RoutePolicy) -> int:
+        if policy.priority == HIGH:
+            return self.capacity
+        return max(1, self.capacity - self.reserved_for_high)
+
+    async def _acquire_one(self, limiter: _Limiter, policy: RoutePolicy, cap: int, deadline: float) -> str | None:
+        """Возвращает None при успехе или причину отказа"""
+        if limiter.try_acquire(cap):
+            return None
+        # В общей очереди ждут запросы всех маршрутов: считаем только свои
+        if limiter.queued(policy.prefix) >= policy.max_queue:
+            return "shed_queue_full"
+        waiter = limiter.enqueue(policy.prefix, policy.priority, cap)
+        if waiter.future.done():
+            return None
+        self._stats[policy.prefix]["queued"] += 1
+        timeout = deadline - asyncio.get_running_loop().time()
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter.future), timeout=max(timeout, 0))
+            return None
+        except asyncio.TimeoutError:
+            limiter.cancel(waiter)
+            return "shed_timeout"
+        except asyncio.CancelledError:
+            limiter.cancel(waiter)
+            raise
+
+    async def acquire(self, policy: RoutePolicy) -> str | None:
+        route, global_ = self._limiters(policy)
+        deadline = asyncio.get_running_loop().time() + self.queue_timeout
+        reason = await self._acquire_one(route, policy, policy.max_concurrency, deadline)
+        if reason is None and policy.global_slot:
+            try:
+                reason = await self._acquire_one(global_, policy, self._global_cap(policy), deadline)
+            except asyncio.CancelledError:
+                route.release()
+                raise
+            if reason is not None:
+                route.release()
+        if reason is None:
+            self._stats[policy.prefix]["admitted"] += 1
+        else:
+            self._stats[policy.prefix][reason] += 1
+        return reason
+
+    def release(self, policy: RoutePolicy):
+        route, global_ = self._limiters(policy)
+        if policy.global_slot:
+            global_.release()
+        route.release()
+
+    def stats(self) -> dict:
+        routes = {}
+        for prefix, counters in self._stats.items():
+            limiter = self._routes.get(prefix)
+            routes[prefix] = {
+                **counters,
+                "in_flight": limiter.in_use if limiter else 0,
+                "waiting": len(limiter.waiters) if limiter else 0,
+            }
+        return {
+            "capacity": self.capacity,
+            "in_flight": self._global.in_use if self._global else 0,
+            "waiting": len(self._global.waiters) if self._global else 0,
+            "routes": routes,
+        }
+
+class AdmissionMiddleware:
+    """Отклоняет запросы с 503 и Retry-After, когда очередь к БД переполнена"""
+
+    def __init__(self, app: ASGIApp, controller: AdmissionController) -> None:
+        self.app = app
+        self.controller = controller
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        policy = self.controller.match(scope["path"]) if scope["type"] == "http" else None
+        if policy is None or scope["method"] == "OPTIONS":
+            await self.app(scope, receive, send)
+            return
+
+        reason = await self.controller.acquire(policy)
+        if reason is not None:
+            response = JSONResponse(
+                {"detail": "Service is overloaded, retry later"},
+                status_code=503,
+                headers={"Retry-After": str(RETRY_AFTER_SECONDS)}
+            )
+            await response(scope, receive, send)
+            return
+        released = False
+
+        def release():
+            nonlocal released
+            if not released:
+                released = True
+                self.controller.release(policy)
+
+        async def send_wrapper(message: Message) -> None:
+            await send(message)
+            # BackgroundTasks выполняются после отправки тела, уже без слота
+            if message["type"] == "http.response.body" and not message.get("more_body", False):
+                release()
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            release()
@@ -0,0 +1,249 @@
+import cProfile
+import marshal
+import os
+import pstats
+import random
+import sys
+import threading
+import time
+import uuid
+from collections import deque
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+# Профилирование включается заголовком X-Profile: <PROFILER_TOKEN> или по доле запросов
+PROFILER_TOKEN = os.getenv("PROFILER_TOKEN")
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", 0))
+PROFILE_INTERVAL = float(os.getenv("PROFILE_INTERVAL", 0.001))
+PROFILES_KEPT = int(os.getenv("PROFILES_KEPT", 20))
+
+_current_profile: ContextVar["RequestProfile | None"] = ContextVar("current_profile", default=None)
+# cProfile в процессе может быть включен только один (на 3.12+ второй enable() падает)
+_cprofile_lock = threading.Lock()
+
+class RequestProfile:
+    def __init__(self, method: str, path: str, mode: str):
+        self.profile_id = uuid.uuid4().hex
+        self.method = method
+        self.path = path
+        self.mode = mode
+        self.created_at = datetime.now(timezone.utc)
+        self.started = time.perf_counter()
+        self.duration = 0.0
+        self.status_code: int | None = None
+        # (время от начала, стек [(функция, файл, строка), ...])
+        self.samples: list[tuple[float, tuple]] = []
+        # {"statement", "start", "duration"} относительно начала запроса
+        self.sql: list[dict] = []
+        self.pstats_data: bytes | None = None
+
+    def summary(self) -> dict:
+        return {
+            "profile_id": self.profile_id,
+            "method": self.method,
+            "path": self.path,
+            "mode": self.mode,
+            "status_code": self.status_code,
+            "created_at": self.created_at,
+            "duration_ms": round(self.duration * 1000, 3),
+            "samples": len(self.samples),
+            "sql_count": len(self.sql),
+            "sql_ms": round(sum(item["duration"] for item in self.sql) * 1000, 3),
+            "sql": [
+                {
+                    "statement": item["statement"],
+                    "start_ms": round(item["start"] * 1000, 3),
+                    "duration_ms": round(item["duration"] * 1000, 3),
+                }
+                for item in self.sql
+            ],
+        }
+
+    def to_speedscope(self) -> dict:
+        """Профиль в формате speedscope: выборки стека и отдельная дорожка SQL"""
+        frames: list[dict] = []
+        frame_index: dict[tuple, int] = {}
+
+        def index_of(frame: tuple) -> int:
+            if frame not in frame_index:
+                frame_index[frame] = len(frames)
+                name, file, line = frame
+                frames.append({"name": name, "file": file, "line": line})
+            return frame_index[frame]
+
+        samples = [[index_of(frame) for frame in stack] for _, stack in self.samples]
+        profiles = [{
+            "type": "sampled",
+            "name": f"{self.method} {self.path}",
+            "unit": "seconds",
+            "startValue": 0,
+            "endValue": self.duration,
+            "samples": samples,
+            "weights": [PROFILE_INTERVAL] * len(samples),
+        }]
+        events = []
+        for item in self.sql:
+            frame = index_of((item["statement"][:200], "SQL", 0))
+            events.append({"type": "O", "frame": frame, "at": item["start"]})
+            events.append({"type": "C", "frame": frame, "at": item["start"] + item["duration"]})
+        profiles.append({
+            "type": "evented",
+            "name": "SQL",
+            "unit": "seconds",
+            "startValue": 0,
+            "endValue": self.duration,
+            "events": events,
+        })
+        return {
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "shared": {"frames": frames},
+            "profiles": profiles,
+            "name": f"{self.method} {self.path}",
+            "exporter": "MasterTask profiler",
+        }
+
+class ProfileStore:
+    """Последние PROFILES_KEPT профилей в памяти процесса"""
+
+    def __init__(self, maxlen: int = PROFILES_KEPT):
+        self._profiles: deque[RequestProfile] = deque(maxlen=maxlen)
+        self._lock = threading.Lock()
+
+    def add(self, profile: RequestProfile):
+        with self._lock:
+            self._profiles.append(profile)
+
+    def list(self) -> list[RequestProfile]:
+        with self._lock:
+            return list(reversed(self._profiles))
+
+    def get(self, profile_id: str) -> RequestProfile | None:
+        with self._lock:
+            for profile in self._profiles:
+                if profile.profile_id == profile_id:
+                    return profile
+        return None
+
+profile_store = ProfileStore()
+
+class _StackSampler(threading.Thread):
+    """Статистический профилировщик: периодически снимает стек потока запроса.
+
+    Все async-эндпоинты работают в потоке event loop, поэтому выборка
+    сохраняется, только если в стеке есть кадр этого запроса (owner_frame):
+    пока задача запроса ждет, стеки других запросов в профиль не попадают.
+    """
+
+    def __init__(self, profile: RequestProfile, thread_id: int, interval: float, owner_frame):
+        super().__init__(daemon=True, name="request-profiler")
+        self.profile = profile
+        self.thread_id = thread_id
+        self.interval = interval
+        self.owner_frame = owner_frame
+        self._stopped = threading.Event()
+
+    def run(self):
+        while not self._stopped.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            owned = False
+            while frame is not None:
+                code = frame.f_code
+                stack.append((code.co_name, code.co_filename, code.co_firstlineno))
+                owned = owned or frame is self.owner_frame
+                frame = frame.f_back
+            if owned:
+                stack.reverse()
+                self.profile.samples.append((time.perf_counter() - self.profile.started, tuple(stack)))
+
+    def stop(self):
+        self._stopped.set()
+        self.join()
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current_profile.get() is not None:
+        conn.info.setdefault("profile_query_start", []).append(time.perf_counter())
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    profile = _current_profile.get()
+    if profile is None or not conn.info.get("profile_query_start"):
+        return
+    start = conn.info["profile_query_start"].pop()
+    profile.sql.append({
+        "statement": statement,
+        "start": start - profile.started,
+        "duration": time.perf_counter() - start,
+    })
+
+class ProfilingMiddleware:
+    """Профилирует запрос по заголовку X-Profile или с вероятностью PROFILE_SAMPLE_RATE.
+
+    X-Profile-Mode: cprofile вместо выборок стека включает cProfile (выгрузка в pstats).
+    cProfile одновременно работает только для одного запроса и видит все вызовы
+    в потоке event loop, включая параллельные запросы.
+    """
+
+    def __init__(self, app: ASGIApp, store: ProfileStore = profile_store,
+                 token: str | None = PROFILER_TOKEN, sample_rate: float = PROFILE_SAMPLE_RATE) -> None:
+        self.app = app
+        self.store = store
+        self.token = token
+        self.sample_rate = sample_rate
+
+    def _should_profile(self, headers: Headers) -> bool:
+        requested = headers.get("x-profile")
+        if requested is not None and self.token and requested == self.token:
+            return True
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["path"].startswith("/profiles"):
+            await self.app(scope, receive, send)
+            return
+        headers = Headers(scope=scope)
+        if not self._should_profile(headers):
+            await self.app(scope, receive, send)
+            return
+
+        mode = "sample"
+        if headers.get("x-profile-mode") == "cprofile":
+            # Пока идет другой cProfile-профиль, переходим на выборки стека
+            if _cprofile_lock.acquire(blocking=False):
+                mode = "cprofile"
+        profile = RequestProfile(scope["method"], scope["path"], mode)
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                profile.status_code = message["status"]
+                MutableHeaders(raw=message["headers"])["X-Profile-Id"] = profile.profile_id
+            await send(message)
+
+        token = _current_profile.set(profile)
+        profiler = None
+        sampler = None
+        try:
+            if mode == "cprofile":
+                profiler = cProfile.Profile()
+                profiler.enable()
+            else:
+                # Кадр этой корутины есть в стеке потока, только пока выполняется наш запрос
+                sampler = _StackSampler(profile, threading.get_ident(), PROFILE_INTERVAL, sys._getframe())
+                sampler.start()
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            profile.duration = time.perf_counter() - profile.started
+            if profiler is not None:
+                profiler.disable()
+                profile.pstats_data = marshal.dumps(pstats.Stats(profiler).stats)
+            if mode == "cprofile":
+                _cprofile_lock.release()
+            if sampler is not None:
+                sampler.stop()
+            _current_profile.reset(token)
+            self.store.add(profile)
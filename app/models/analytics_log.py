@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, CheckConstraint
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, CheckConstraint, Index
 from sqlalchemy.dialects.postgresql import JSONB
 from datetime import datetime, timezone
 import enum
@@ -13,11 +13,16 @@ class AnalyticsLog(Base):
     __tablename__ = "analytics_logs"
     log_id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.user_id", ondelete="CASCADE"))
-    task_id = Column(Integer, ForeignKey("tasks.task_id", ondelete="CASCADE"))
+    # Без внешнего ключа: лог может ссылаться и на архивированную задачу (archived_tasks).
+    # При удалении задачи логи удаляет триггер delete_task_analytics_logs.
+    task_id = Column(Integer)
     action = Column(String(20))
     timestamp = Column(DateTime, default=datetime.now(timezone.utc))
     details = Column(JSONB)
     
     __table_args__ = (
         CheckConstraint("action IN ('created', 'completed', 'updated')", name='check_action'),
+        Index('idx_analytics_logs_user_timestamp', user_id, timestamp.desc()),
+        Index('idx_analytics_logs_user_action', user_id, action),
+        Index('idx_analytics_logs_task_id', task_id),
     )
\ No newline at end of file
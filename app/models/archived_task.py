@@ -0,0 +1,36 @@
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, Text, Index
+from datetime import datetime, timezone
+from app.database.db import Base
+
+class ArchivedTask(Base):
+    """Завершенные задачи, перенесенные из tasks фоновым архиватором"""
+    __tablename__ = "archived_tasks"
+    task_id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.user_id", ondelete="CASCADE"), nullable=False)
+    title = Column(String(255), nullable=False)
+    description = Column(Text)
+    category_id = Column(Integer, ForeignKey("categories.category_id", ondelete="SET NULL"))
+    priority = Column(String(20))
+    deadline = Column(DateTime)
+    is_repeating = Column(Boolean, default=False)
+    repeat_interval = Column(String(50))
+    status = Column(String(20))
+    is_favorite = Column(Boolean, default=False)
+    created_at = Column(DateTime)
+    updated_at = Column(DateTime)
+    completed_at = Column(DateTime)
+    archived_at = Column(DateTime, default=datetime.now(timezone.utc))
+    
+    __table_args__ = (
+        Index('idx_archived_tasks_user_id', user_id),
+        Index('idx_archived_tasks_category_id', category_id),
+    )
+
+class ArchivedTaskTag(Base):
+    __tablename__ = "archived_task_tags"
+    task_id = Column(Integer, ForeignKey("archived_tasks.task_id", ondelete="CASCADE"), primary_key=True)
+    tag_id = Column(Integer, ForeignKey("tags.tag_id", ondelete="CASCADE"), primary_key=True)
+    
+    __table_args__ = (
+        Index('idx_archived_task_tags_tag_id', tag_id),
+    )
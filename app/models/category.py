@@ -15,4 +15,4 @@ class Category(Base):
         UniqueConstraint('user_id', 'name', name='unique_category_name_per_user'),
     )
     
-    tasks = relationship("Task", back_populates="category")
+    tasks = relationship("Task", back_populates="category", passive_deletes=True)
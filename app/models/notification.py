@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, Text, CheckConstraint
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, Text, CheckConstraint, Index
 from datetime import datetime, timezone
 import enum
 from app.database.db import Base
@@ -19,4 +19,7 @@ class Notification(Base):
     
     __table_args__ = (
         CheckConstraint("type IN ('overdue', 'reminder')", name='check_notification_type'),
+        Index('idx_notifications_user_read_sent', user_id, is_read, sent_at.desc()),
+        Index('idx_notifications_user_sent', user_id, sent_at.desc()),
+        Index('idx_notifications_task_id', task_id),
     )
\ No newline at end of file
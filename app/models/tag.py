@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime
+from sqlalchemy import Column, Integer, String, DateTime, Index
 from datetime import datetime, timezone
 from app.database.db import Base
 from sqlalchemy.orm import relationship
@@ -9,5 +9,9 @@ class Tag(Base):
     name = Column(String(100), unique=True, nullable=False)
     created_at = Column(DateTime, default=datetime.now(timezone.utc))
     
-    tasks = relationship("TaskTag", back_populates="tag")
+    __table_args__ = (
+        Index('idx_tags_name_prefix', name, postgresql_ops={'name': 'text_pattern_ops'}),
+    )
+    
+    tasks = relationship("TaskTag", back_populates="tag", passive_deletes=True)
     
\ No newline at end of file
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, Text, CheckConstraint
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, Text, CheckConstraint, Index, text
 from datetime import datetime, timezone
 import enum
 from app.database.db import Base
@@ -35,8 +35,12 @@ class Task(Base):
     __table_args__ = (
         CheckConstraint("priority IN ('high', 'medium', 'low')", name='check_priority'),
         CheckConstraint("status IN ('active', 'in_progress', 'completed', 'overdue')", name='check_status'),
+        Index('idx_tasks_category_id', category_id),
+        Index('idx_tasks_completed_at', completed_at, postgresql_where=text("status = 'completed'")),
+        Index('idx_tasks_user_open_deadline', user_id, deadline,
+              postgresql_where=text("status IN ('active', 'in_progress')")),
     )
 
     user = relationship("User", back_populates="tasks")
     category = relationship("Category", back_populates="tasks")
-    tags = relationship("TaskTag", back_populates="task")
\ No newline at end of file
+    tags = relationship("TaskTag", back_populates="task", passive_deletes=True)
\ No newline at end of file
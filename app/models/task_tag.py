@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, ForeignKey
+from sqlalchemy import Column, Integer, ForeignKey, Index
 from app.database.db import Base
 from sqlalchemy.orm import relationship
 
@@ -9,5 +9,9 @@ class TaskTag(Base):
     tag_id = Column(Integer, ForeignKey("tags.tag_id", ondelete="CASCADE"), 
                     primary_key=True)
     
+    __table_args__ = (
+        Index('idx_task_tags_tag_id', tag_id),
+    )
+    
     task = relationship("Task", back_populates="tags")
     tag = relationship("Tag", back_populates="tasks")
\ No newline at end of file
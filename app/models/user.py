@@ -14,4 +14,4 @@ class User(Base):
     last_login = Column(DateTime)
     preferences = Column(JSONB)
     
-    tasks = relationship("Task", back_populates="user")
\ No newline at end of file
+    tasks = relationship("Task", back_populates="user", passive_deletes=True)
\ No newline at end of file
@@ -0,0 +1,20 @@
+from sqlalchemy import Column, Integer, DateTime, ForeignKey, text
+from sqlalchemy.dialects.postgresql import JSONB
+from datetime import datetime, timezone
+from app.database.db import Base
+
+class UserTaskSummary(Base):
+    """Сводка по задачам пользователя, обновляется триггером sync_user_task_summary"""
+    __tablename__ = "user_task_summary"
+    user_id = Column(Integer, ForeignKey("users.user_id", ondelete="CASCADE"), primary_key=True)
+    total_count = Column(Integer, nullable=False, default=0)
+    active_count = Column(Integer, nullable=False, default=0)
+    in_progress_count = Column(Integer, nullable=False, default=0)
+    completed_count = Column(Integer, nullable=False, default=0)
+    overdue_count = Column(Integer, nullable=False, default=0)
+    high_priority_count = Column(Integer, nullable=False, default=0)
+    medium_priority_count = Column(Integer, nullable=False, default=0)
+    low_priority_count = Column(Integer, nullable=False, default=0)
+    favorite_count = Column(Integer, nullable=False, default=0)
+    category_counts = Column(JSONB, nullable=False, default=dict, server_default=text("'{}'::jsonb"))
+    updated_at = Column(DateTime, default=datetime.now(timezone.utc))
@@ -0,0 +1,80 @@
+import asyncio
+import logging
+import os
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import select, insert, inspect, literal, DateTime
+from sqlalchemy.orm import Session
+from app.database.db import SessionLocal
+from app.models.task import Task, StatusEnum
+from app.models.task_tag import TaskTag
+from app.models.archived_task import ArchivedTask, ArchivedTaskTag
+
+# Через сколько дней после выполнения задача уходит в архив
+ARCHIVE_AFTER_DAYS = int(os.getenv("ARCHIVE_AFTER_DAYS", 30))
+ARCHIVE_BATCH_SIZE = int(os.getenv("ARCHIVE_BATCH_SIZE", 1000))
+ARCHIVE_INTERVAL_SECONDS = int(os.getenv("ARCHIVE_INTERVAL_SECONDS", 3600))
+
+logger = logging.getLogger(__name__)
+
+TASK_COLUMNS = [column.name for column in Task.__table__.c]
+
+def _check_schema(db: Session):
+    """На старой схеме удаление задачи каскадом удалило бы и ее аналитические логи"""
+    for foreign_key in inspect(db.connection()).get_foreign_keys("analytics_logs"):
+        if foreign_key["referred_table"] == "tasks":
+            raise RuntimeError(
+                "analytics_logs.task_id still references tasks: apply sql/upgrade_archive_tasks.sql"
+            )
+
+def archive_completed_tasks(db: Session, older_than: timedelta | None = None,
+                            batch_size: int = ARCHIVE_BATCH_SIZE) -> int:
+    """Переносит завершенные задачи старше порога в archived_tasks пачками.
+
+    Каждая пачка переносится в своей транзакции. Возвращает число перенесенных задач.
+    """
+    _check_schema(db)
+    now = datetime.now(timezone.utc)
+    cutoff = now - (older_than if older_than is not None else timedelta(days=ARCHIVE_AFTER_DAYS))
+    archived = 0
+    while True:
+        # Занятые другими транзакциями строки пропускаем
+        task_ids = [task_id for (task_id,) in db.query(Task.task_id).filter(
+            Task.status == StatusEnum.completed.value,
+            Task.completed_at < cutoff
+        ).order_by(Task.completed_at).limit(batch_size).with_for_update(skip_locked=True).all()]
+        if not task_ids:
+            return archived
+
+        db.execute(insert(ArchivedTask).from_select(
+            [*TASK_COLUMNS, "archived_at"],
+            select(*Task.__table__.c, literal(now, DateTime)).where(Task.task_id.in_(task_ids))
+        ))
+        db.execute(insert(ArchivedTaskTag).from_select(
+            ["task_id", "tag_id"],
+            select(TaskTag.task_id, TaskTag.tag_id).where(TaskTag.task_id.in_(task_ids))
+        ))
+        # task_tags и уведомления удаляет каскад, логи остаются (см. delete_task_analytics_logs)
+        db.query(Task).filter(Task.task_id.in_(task_ids)).delete(synchronize_session=False)
+        db.commit()
+        archived += len(task_ids)
+
+def _archive_pass() -> int:
+    db = SessionLocal()
+    try:
+        return archive_completed_tasks(db)
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+async def run_archiver():
+    """Периодически запускает архивацию в пуле потоков, не блокируя event loop"""
+    while True:
+        try:
+            archived = await asyncio.to_thread(_archive_pass)
+            if archived:
+                logger.info("Archived %d completed tasks", archived)
+        except Exception:
+            logger.exception("Task archiving failed")
+        await asyncio.sleep(ARCHIVE_INTERVAL_SECONDS)
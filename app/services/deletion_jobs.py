@@ -0,0 +1,149 @@
+import os
+import threading
+import uuid
+from datetime import datetime, timedelta, timezone
+from pydantic import BaseModel
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from fastapi import BackgroundTasks
+from app.database.db import SessionLocal, batch_background
+from app.database.replicas import replica_router
+from app.models.user import User
+from app.models.category import Category
+from app.models.task import Task
+from app.models.analytics_log import AnalyticsLog
+from app.models.notification import Notification
+from app.models.archived_task import ArchivedTask
+from app.services.user_cache import user_cache
+
+# Размер пачки удаления и порог, начиная с которого удаление уходит в фон
+DELETE_CHUNK_SIZE = int(os.getenv("DELETE_CHUNK_SIZE", 1000))
+BACKGROUND_DELETE_THRESHOLD = int(os.getenv("BACKGROUND_DELETE_THRESHOLD", 5000))
+# Сколько секунд хранить завершенные задания для опроса статуса
+DELETION_JOB_TTL = int(os.getenv("DELETION_JOB_TTL", 3600))
+
+class DeletionJobResponse(BaseModel):
+    job_id: str
+    kind: str
+    target_id: int
+    status: str
+    total: int
+    processed: int
+    error: str | None
+    created_at: datetime
+    finished_at: datetime | None
+
+# Задания хранятся в памяти процесса: при нескольких воркерах uvicorn статус
+# доступен только на том воркере, который принял запрос на удаление.
+_jobs: dict[str, dict] = {}
+_lock = threading.Lock()
+
+def _prune_finished():
+    """Удаляет завершенные задания старше DELETION_JOB_TTL (вызывать под _lock)"""
+    cutoff = datetime.now(timezone.utc) - timedelta(seconds=DELETION_JOB_TTL)
+    for job_id in [job_id for job_id, job in _jobs.items()
+                   if job["finished_at"] is not None and job["finished_at"] < cutoff]:
+        del _jobs[job_id]
+
+def start_job(kind: str, target_id: int, total: int) -> tuple[dict, bool]:
+    """Регистрирует задание на удаление.
+
+    Если для того же объекта задание уже идет, возвращает его и False.
+    """
+    with _lock:
+        _prune_finished()
+        for job in _jobs.values():
+            if job["kind"] == kind and job["target_id"] == target_id and job["status"] in ("pending", "running"):
+                return dict(job), False
+        job = {
+            "job_id": uuid.uuid4().hex,
+            "kind": kind,
+            "target_id": target_id,
+            "status": "pending",
+            "total": total,
+            "processed": 0,
+            "error": None,
+            "created_at": datetime.now(timezone.utc),
+            "finished_at": None,
+        }
+        _jobs[job["job_id"]] = job
+        return dict(job), True
+
+def schedule_job(background_tasks: BackgroundTasks, work, *args):
+    """Ставит удаление в фон; внутри /batch — после ответа на весь пакет"""
+    deferred = batch_background.get()
+    if deferred is not None:
+        deferred.append((work, args))
+    else:
+        background_tasks.add_task(work, *args)
+
+def get_job(job_id: str) -> dict | None:
+    with _lock:
+        _prune_finished()
+        job = _jobs.get(job_id)
+        return dict(job) if job else None
+
+def _update_job(job_id: str, **changes):
+    with _lock:
+        _jobs[job_id].update(changes)
+
+def _add_progress(job_id: str, count: int):
+    with _lock:
+        _jobs[job_id]["processed"] += count
+
+def _delete_in_chunks(db: Session, model, pk_column, condition, job_id: str | None = None):
+    """Удаляет строки пачками по DELETE_CHUNK_SIZE, фиксируя каждую пачку отдельно"""
+    while True:
+        chunk = select(pk_column).where(condition).limit(DELETE_CHUNK_SIZE)
+        deleted = db.query(model).filter(pk_column.in_(chunk)).delete(synchronize_session=False)
+        db.commit()
+        if not deleted:
+            return
+        if job_id:
+            _add_progress(job_id, deleted)
+
+def _run(job_id: str, work):
+    db = SessionLocal()
+    try:
+        _update_job(job_id, status="running")
+        work(db)
+        _update_job(job_id, status="completed", finished_at=datetime.now(timezone.utc))
+    except Exception as e:
+        db.rollback()
+        _update_job(job_id, status="failed", error=str(e), finished_at=datetime.now(timezone.utc))
+    finally:
+        db.close()
+
+def delete_user_in_chunks(job_id: str, user_id: int):
+    """Фоновое удаление пользователя: логи, уведомления, задачи пачками, затем сам пользователь"""
+    def work(db: Session):
+        # Сначала зависимые от пользователя строки, чтобы каскад от задач был небольшим
+        _delete_in_chunks(db, AnalyticsLog, AnalyticsLog.log_id, AnalyticsLog.user_id == user_id)
+        _delete_in_chunks(db, Notification, Notification.notification_id, Notification.user_id == user_id)
+        # Задачи пачками, связи task_tags удаляются каскадом БД
+        _delete_in_chunks(db, Task, Task.task_id, Task.user_id == user_id, job_id)
+        _delete_in_chunks(db, ArchivedTask, ArchivedTask.task_id, ArchivedTask.user_id == user_id)
+        db.query(User).filter(User.user_id == user_id).delete(synchronize_session=False)
+        db.commit()
+        user_cache.invalidate(user_id)
+    _run(job_id, work)
+
+def delete_category_in_chunks(job_id: str, category_id: int):
+    """Фоновое удаление категории: отвязываем задачи пачками, затем удаляем категорию"""
+    def work(db: Session):
+        owner_id = db.query(Category.user_id).filter(Category.category_id == category_id).scalar()
+        while True:
+            chunk = select(Task.task_id).where(Task.category_id == category_id).limit(DELETE_CHUNK_SIZE)
+            updated = db.query(Task).filter(Task.task_id.in_(chunk)).update(
+                {Task.category_id: None}, synchronize_session=False
+            )
+            db.commit()
+            # Владелец видит уже отвязанные задачи, а не данные отстающей реплики
+            replica_router.remember_write(owner_id)
+            if not updated:
+                break
+            _add_progress(job_id, updated)
+        db.query(Category).filter(Category.category_id == category_id).delete(synchronize_session=False)
+        db.commit()
+        replica_router.remember_write(owner_id)
+    _run(job_id, work)
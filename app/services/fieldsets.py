@@ -0,0 +1,16 @@
+from fastapi import HTTPException
+from pydantic import BaseModel
+
+def parse_fields(fields: str | None, model: type[BaseModel], always: tuple[str, ...] = ()) -> list[str] | None:
+    """Разбирает параметр ?fields=a,b,c в список полей модели ответа.
+
+    Возвращает None, если параметр не передан (нужны все поля).
+    """
+    if not fields:
+        return None
+    requested = [name.strip() for name in fields.split(",") if name.strip()]
+    unknown = [name for name in requested if name not in model.model_fields]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
+    # Ключевые поля возвращаются всегда, порядок сохраняется
+    return list(dict.fromkeys([*always, *requested]))
@@ -0,0 +1,88 @@
+import asyncio
+import hashlib
+import hmac
+import os
+import secrets
+from concurrent.futures import ThreadPoolExecutor
+
+# Параметры scrypt (стоимость настраивается через переменные окружения)
+SCRYPT_N = int(os.getenv("PASSWORD_SCRYPT_N", 2 ** 14))
+SCRYPT_R = int(os.getenv("PASSWORD_SCRYPT_R", 8))
+SCRYPT_P = int(os.getenv("PASSWORD_SCRYPT_P", 1))
+SALT_BYTES = 16
+KEY_BYTES = 32
+
+# Ограниченный пул: hashlib.scrypt отпускает GIL, поэтому потоков достаточно
+HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", 4))
+
+_executor = ThreadPoolExecutor(max_workers=HASH_WORKERS, thread_name_prefix="password-hash")
+
+SCRYPT = "scrypt"
+# scrypt поверх SHA-256 в hex, который присылает фронтенд при регистрации
+SCRYPT_SHA256 = "scrypt-sha256"
+
+def _legacy_sha256(password: str) -> str:
+    return hashlib.sha256(password.encode()).hexdigest()
+
+def _is_legacy(stored_hash: str) -> bool:
+    """Старый формат: несоленый SHA-256 в hex"""
+    return not stored_hash.startswith((SCRYPT + "$", SCRYPT_SHA256 + "$"))
+
+def _scrypt(secret: str, salt: bytes, n: int, r: int, p: int, dklen: int) -> bytes:
+    return hashlib.scrypt(secret.encode(), salt=salt, n=n, r=r, p=p, maxmem=256 * n * r, dklen=dklen)
+
+def _encode(scheme: str, secret: str) -> str:
+    salt = secrets.token_bytes(SALT_BYTES)
+    key = _scrypt(secret, salt, SCRYPT_N, SCRYPT_R, SCRYPT_P, KEY_BYTES)
+    return f"{scheme}${SCRYPT_N}${SCRYPT_R}${SCRYPT_P}${salt.hex()}${key.hex()}"
+
+def hash_password(password: str) -> str:
+    """Хэширует пароль через scrypt: scrypt$n$r$p$salt$hash"""
+    return _encode(SCRYPT, password)
+
+def hash_client_digest(sha256_hex: str) -> str:
+    """Хэширует присланный клиентом SHA-256 пароля: scrypt-sha256$n$r$p$salt$hash"""
+    return _encode(SCRYPT_SHA256, sha256_hex.lower())
+
+def verify_password(password: str, stored_hash: str) -> bool:
+    """Проверяет пароль по scrypt, scrypt-sha256 и старому формату SHA-256"""
+    if not stored_hash:
+        return False
+    if _is_legacy(stored_hash):
+        return hmac.compare_digest(_legacy_sha256(password), stored_hash)
+    try:
+        scheme, n, r, p, salt_hex, key_hex = stored_hash.split("$")
+        expected = bytes.fromhex(key_hex)
+        secret = _legacy_sha256(password) if scheme == SCRYPT_SHA256 else password
+        key = _scrypt(secret, bytes.fromhex(salt_hex), int(n), int(r), int(p), len(expected))
+    except ValueError:
+        return False
+    return hmac.compare_digest(key, expected)
+
+def needs_rehash(stored_hash: str) -> bool:
+    """Нужно ли пересчитать хэш (не scrypt от пароля или изменилась стоимость)"""
+    if _is_legacy(stored_hash):
+        return True
+    try:
+        scheme, n, r, p, _, _ = stored_hash.split("$")
+    except ValueError:
+        return True
+    return scheme != SCRYPT or (int(n), int(r), int(p)) != (SCRYPT_N, SCRYPT_R, SCRYPT_P)
+
+# Для неизвестного email проверяем пароль против этого хэша: ответ занимает столько же времени
+DUMMY_HASH = hash_password(secrets.token_hex(16))
+
+async def hash_password_async(password: str) -> str:
+    """hash_password в пуле потоков, не блокируя event loop"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_executor, hash_password, password)
+
+async def verify_password_async(password: str, stored_hash: str) -> bool:
+    """verify_password в пуле потоков, не блокируя event loop"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_executor, verify_password, password, stored_hash)
+
+async def hash_client_digest_async(sha256_hex: str) -> str:
+    """hash_client_digest в пуле потоков, не блокируя event loop"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_executor, hash_client_digest, sha256_hex)
@@ -0,0 +1,72 @@
+import os
+import threading
+import time
+from sqlalchemy.orm import Session
+from app.database.db import batch_session
+from app.models.user import User
+
+# Кэш в памяти процесса: другие воркеры увидят изменения не позже чем через TTL
+USER_CACHE_TTL = float(os.getenv("USER_CACHE_TTL", 30.0))
+USER_CACHE_SIZE = int(os.getenv("USER_CACHE_SIZE", 10000))
+
+class UserCache:
+    """Короткоживущий кэш существования пользователя и его настроек.
+
+    Запись есть только для существующих пользователей; отсутствие не кэшируется.
+    """
+
+    def __init__(self, ttl: float = USER_CACHE_TTL, max_size: int = USER_CACHE_SIZE):
+        self.ttl = ttl
+        self.max_size = max_size
+        # user_id -> (истекает, настройки)
+        self._entries: dict[int, tuple[float, dict]] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _enabled() -> bool:
+        # Внутри атомарного /batch данные могут быть откачены, их не кэшируем
+        return batch_session.get() is None
+
+    def _get(self, user_id: int) -> dict | None:
+        if not self._enabled():
+            return None
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None:
+                return None
+            expires_at, preferences = entry
+            if expires_at < time.monotonic():
+                del self._entries[user_id]
+                return None
+            return preferences
+
+    def _put(self, user_id: int, preferences: dict | None):
+        if not self._enabled():
+            return
+        now = time.monotonic()
+        with self._lock:
+            if len(self._entries) >= self.max_size:
+                self._entries = {uid: entry for uid, entry in self._entries.items() if entry[0] >= now}
+                if len(self._entries) >= self.max_size:
+                    self._entries.clear()
+            self._entries[user_id] = (now + self.ttl, dict(preferences or {}))
+
+    def invalidate(self, user_id: int):
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+    def get_preferences(self, db: Session, user_id: int) -> dict | None:
+        """Настройки пользователя или None, если пользователя нет"""
+        preferences = self._get(user_id)
+        if preferences is not None:
+            return dict(preferences)
+        row = db.query(User.preferences).filter(User.user_id == user_id).first()
+        if row is None:
+            return None
+        self._put(user_id, row.preferences)
+        return dict(row.preferences or {})
+
+    def user_exists(self, db: Session, user_id: int) -> bool:
+        return self.get_preferences(db, user_id) is not None
+
+user_cache = UserCache()
@@ -0,0 +1,82 @@
+"""Пропускная способность входа при конкурентных запросах.
+
+Без --url измеряет проверку пароля в процессе: scrypt в пуле потоков
+(verify_password_async) против вызова прямо в event loop, и задержку event loop,
+пока идут проверки. С --url шлет POST /users/login на запущенный сервер.
+
+    python -m benchmarks.login_throughput --requests 200 --concurrency 32
+    python -m benchmarks.login_throughput --url http://localhost:8000 --email a@b.c --password secret
+"""
+import argparse
+import asyncio
+import time
+from app.services import passwords
+
+async def _loop_lag(stop: asyncio.Event, interval: float = 0.005) -> float:
+    """Максимальная задержка пробуждения event loop, пока идет замер"""
+    worst = 0.0
+    loop = asyncio.get_running_loop()
+    while not stop.is_set():
+        started = loop.time()
+        await asyncio.sleep(interval)
+        worst = max(worst, loop.time() - started - interval)
+    return worst
+
+async def _run(total: int, concurrency: int, call) -> tuple[float, float]:
+    semaphore = asyncio.Semaphore(concurrency)
+    stop = asyncio.Event()
+    lag = asyncio.create_task(_loop_lag(stop))
+
+    async def one():
+        async with semaphore:
+            await call()
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(total)))
+    elapsed = time.perf_counter() - started
+    stop.set()
+    return total / elapsed, await lag
+
+async def bench_in_process(total: int, concurrency: int):
+    stored = passwords.hash_password("benchmark-password")
+
+    async def pooled():
+        assert await passwords.verify_password_async("benchmark-password", stored)
+
+    async def inline():
+        # Так выглядел бы scrypt прямо в async-эндпоинте
+        assert passwords.verify_password("benchmark-password", stored)
+
+    print(f"scrypt n={passwords.SCRYPT_N} r={passwords.SCRYPT_R} p={passwords.SCRYPT_P}, "
+          f"workers={passwords.HASH_WORKERS}, requests={total}, concurrency={concurrency}")
+    for name, call in (("thread pool", pooled), ("inline", inline)):
+        rate, lag = await _run(total, concurrency, call)
+        print(f"{name:>12}: {rate:8.1f} logins/s, max event loop lag {lag * 1000:8.1f} ms")
+
+async def bench_http(url: str, email: str, password: str, total: int, concurrency: int):
+    import httpx
+    async with httpx.AsyncClient(base_url=url, timeout=30) as client:
+        async def login():
+            response = await client.post("/users/login", json={"email": email, "password": password})
+            response.raise_for_status()
+
+        rate, _ = await _run(total, concurrency, login)
+    print(f"POST {url}/users/login: {rate:.1f} logins/s (requests={total}, concurrency={concurrency})")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--url")
+    parser.add_argument("--email")
+    parser.add_argument("--password")
+    args = parser.parse_args()
+    if args.url:
+        if not args.email or not args.password:
+            parser.error("--url requires --email and --password")
+        asyncio.run(bench_http(args.url, args.email, args.password, args.requests, args.concurrency))
+    else:
+        asyncio.run(bench_in_process(args.requests, args.concurrency))
+
+if __name__ == "__main__":
+    main()
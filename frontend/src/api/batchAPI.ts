@@ -0,0 +1,28 @@
+import axios from "axios";
+
+const API_URL = 'http://localhost:8000';
+
+export interface BatchSubRequest {
+  id?: string;
+  method: 'GET' | 'POST' | 'PUT' | 'DELETE';
+  path: string;
+  query?: Record<string, unknown>;
+  body?: unknown;
+}
+
+export interface BatchSubResponse {
+  id: string | null;
+  status: number;
+  body: unknown;
+}
+
+export interface BatchResult {
+  results: BatchSubResponse[];
+  committed: boolean;
+}
+
+// Несколько запросов за один HTTP-запрос; значения "${id.field}" берутся из ответов предыдущих шагов
+export async function runBatch(requests: BatchSubRequest[], atomic = false): Promise<BatchResult> {
+  const { data } = await axios.post(`${API_URL}/batch/`, { requests, atomic });
+  return data;
+}
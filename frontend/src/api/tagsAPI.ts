@@ -18,6 +18,19 @@ export async function getTags(): Promise<Tag[]> {
   return data;
 }
 
+export interface TagSuggestion {
+  tag_id: number;
+  name: string;
+  usage_count: number;
+}
+
+export async function suggestTags(prefix: string, userId?: number, limit = 10): Promise<TagSuggestion[]> {
+  const { data } = await axios.get(`${API_URL}/tags/suggest`, {
+    params: { prefix, user_id: userId, limit }
+  });
+  return data;
+}
+
 export async function getTag(tagId: number): Promise<Tag> {
   const { data } = await axios.get(`${API_URL}/tags/${tagId}`);
   return data;
@@ -51,3 +51,18 @@ export async function loginUser(data: LoginData): Promise<User> {
   return res;
 }
 
+
+export interface UserSummary {
+  user_id: number;
+  total: number;
+  by_status: Record<string, number>;
+  by_priority: Record<string, number>;
+  by_category: Record<string, number>;
+  favorites: number;
+  next_deadline: string | null;
+}
+
+export async function getUserSummary(userId: number): Promise<UserSummary> {
+  const { data } = await axios.get(`${API_URL}/users/${userId}/summary`);
+  return data;
+}
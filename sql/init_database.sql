@@ -58,7 +58,8 @@ CREATE TABLE notifications (
 CREATE TABLE analytics_logs (
     log_id SERIAL PRIMARY KEY,
     user_id INTEGER REFERENCES users(user_id) ON DELETE CASCADE,
-    task_id INTEGER REFERENCES tasks(task_id) ON DELETE CASCADE,
+    -- Без внешнего ключа: лог может ссылаться и на задачу из archived_tasks
+    task_id INTEGER,
     action VARCHAR(20) CHECK (action IN ('created', 'completed', 'updated')),
     timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     details JSONB
@@ -68,6 +69,22 @@ CREATE TABLE analytics_logs (
     CREATE INDEX idx_tasks_deadline ON tasks(deadline);
     CREATE INDEX idx_tasks_status ON tasks(status);
 
+-- Индексы под горячие запросы роутеров
+CREATE INDEX idx_notifications_user_read_sent ON notifications(user_id, is_read, sent_at DESC);
+CREATE INDEX idx_notifications_user_sent ON notifications(user_id, sent_at DESC);
+-- Проверка NOT EXISTS в триггере create_overdue_notification и каскадное удаление задач
+CREATE INDEX idx_notifications_task_id ON notifications(task_id);
+CREATE INDEX idx_analytics_logs_user_timestamp ON analytics_logs(user_id, timestamp DESC);
+CREATE INDEX idx_analytics_logs_user_action ON analytics_logs(user_id, action);
+-- Каскадное удаление задач (ON DELETE CASCADE / SET NULL) без полного сканирования
+CREATE INDEX idx_analytics_logs_task_id ON analytics_logs(task_id);
+CREATE INDEX idx_tasks_category_id ON tasks(category_id);
+-- Поиск кандидатов на архивацию
+CREATE INDEX idx_tasks_completed_at ON tasks(completed_at) WHERE status = 'completed';
+CREATE INDEX idx_task_tags_tag_id ON task_tags(tag_id);
+-- Поиск тегов по префиксу (LIKE 'abc%') при любой локали БД
+CREATE INDEX idx_tags_name_prefix ON tags(name text_pattern_ops);
+
 CREATE OR REPLACE FUNCTION update_overdue_status()
 RETURNS TRIGGER AS $$
 BEGIN
@@ -113,4 +130,169 @@ CREATE TRIGGER create_notification_on_overdue
 AFTER INSERT OR UPDATE ON tasks
 FOR EACH ROW
 WHEN (NEW.status = 'overdue')
-EXECUTE FUNCTION create_overdue_notification();
\ No newline at end of file
+EXECUTE FUNCTION create_overdue_notification();
+
+-- Сводка по задачам пользователя, поддерживается триггером на tasks
+CREATE TABLE user_task_summary (
+    user_id INTEGER PRIMARY KEY REFERENCES users(user_id) ON DELETE CASCADE,
+    total_count INTEGER NOT NULL DEFAULT 0,
+    active_count INTEGER NOT NULL DEFAULT 0,
+    in_progress_count INTEGER NOT NULL DEFAULT 0,
+    completed_count INTEGER NOT NULL DEFAULT 0,
+    overdue_count INTEGER NOT NULL DEFAULT 0,
+    high_priority_count INTEGER NOT NULL DEFAULT 0,
+    medium_priority_count INTEGER NOT NULL DEFAULT 0,
+    low_priority_count INTEGER NOT NULL DEFAULT 0,
+    favorite_count INTEGER NOT NULL DEFAULT 0,
+    category_counts JSONB NOT NULL DEFAULT '{}'::jsonb,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Ближайший дедлайн незавершенных задач берется по этому индексу
+CREATE INDEX idx_tasks_user_open_deadline ON tasks(user_id, deadline)
+    WHERE status IN ('active', 'in_progress');
+
+CREATE OR REPLACE FUNCTION apply_task_summary_delta(
+    p_user_id INTEGER,
+    p_status VARCHAR,
+    p_priority VARCHAR,
+    p_category_id INTEGER,
+    p_is_favorite BOOLEAN,
+    p_sign INTEGER
+)
+RETURNS VOID AS $$
+DECLARE
+    v_category_key TEXT := COALESCE(p_category_id::text, 'none');
+BEGIN
+    -- Строку создаем только при добавлении: при каскадном удалении пользователя ее уже нет
+    IF p_sign > 0 THEN
+        INSERT INTO user_task_summary (user_id) VALUES (p_user_id)
+        ON CONFLICT (user_id) DO NOTHING;
+    END IF;
+
+    UPDATE user_task_summary SET
+        total_count = total_count + p_sign,
+        active_count = active_count + CASE WHEN p_status = 'active' THEN p_sign ELSE 0 END,
+        in_progress_count = in_progress_count + CASE WHEN p_status = 'in_progress' THEN p_sign ELSE 0 END,
+        completed_count = completed_count + CASE WHEN p_status = 'completed' THEN p_sign ELSE 0 END,
+        overdue_count = overdue_count + CASE WHEN p_status = 'overdue' THEN p_sign ELSE 0 END,
+        high_priority_count = high_priority_count + CASE WHEN p_priority = 'high' THEN p_sign ELSE 0 END,
+        medium_priority_count = medium_priority_count + CASE WHEN p_priority = 'medium' THEN p_sign ELSE 0 END,
+        low_priority_count = low_priority_count + CASE WHEN p_priority = 'low' THEN p_sign ELSE 0 END,
+        favorite_count = favorite_count + CASE WHEN p_is_favorite THEN p_sign ELSE 0 END,
+        category_counts = CASE
+            WHEN COALESCE((category_counts ->> v_category_key)::int, 0) + p_sign <= 0
+                THEN category_counts - v_category_key
+            ELSE jsonb_set(
+                category_counts,
+                ARRAY[v_category_key],
+                to_jsonb(COALESCE((category_counts ->> v_category_key)::int, 0) + p_sign)
+            )
+        END,
+        updated_at = CURRENT_TIMESTAMP
+    WHERE user_id = p_user_id;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION sync_user_task_summary()
+RETURNS TRIGGER AS $$
+BEGIN
+    -- Изменения, не влияющие на счетчики, пропускаем
+    IF TG_OP = 'UPDATE'
+       AND OLD.user_id = NEW.user_id
+       AND OLD.status IS NOT DISTINCT FROM NEW.status
+       AND OLD.priority IS NOT DISTINCT FROM NEW.priority
+       AND OLD.category_id IS NOT DISTINCT FROM NEW.category_id
+       AND OLD.is_favorite IS NOT DISTINCT FROM NEW.is_favorite THEN
+        RETURN NULL;
+    END IF;
+
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        PERFORM apply_task_summary_delta(OLD.user_id, OLD.status, OLD.priority, OLD.category_id, OLD.is_favorite, -1);
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        PERFORM apply_task_summary_delta(NEW.user_id, NEW.status, NEW.priority, NEW.category_id, NEW.is_favorite, 1);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER sync_user_task_summary
+AFTER INSERT OR UPDATE OR DELETE ON tasks
+FOR EACH ROW
+EXECUTE FUNCTION sync_user_task_summary();
+
+-- Заполнение сводки для уже существующих задач
+INSERT INTO user_task_summary (
+    user_id, total_count, active_count, in_progress_count, completed_count, overdue_count,
+    high_priority_count, medium_priority_count, low_priority_count, favorite_count, category_counts
+)
+SELECT
+    t.user_id,
+    COUNT(*),
+    COUNT(*) FILTER (WHERE t.status = 'active'),
+    COUNT(*) FILTER (WHERE t.status = 'in_progress'),
+    COUNT(*) FILTER (WHERE t.status = 'completed'),
+    COUNT(*) FILTER (WHERE t.status = 'overdue'),
+    COUNT(*) FILTER (WHERE t.priority = 'high'),
+    COUNT(*) FILTER (WHERE t.priority = 'medium'),
+    COUNT(*) FILTER (WHERE t.priority = 'low'),
+    COUNT(*) FILTER (WHERE t.is_favorite),
+    COALESCE((
+        SELECT jsonb_object_agg(c.category_key, c.task_count)
+        FROM (
+            SELECT COALESCE(category_id::text, 'none') AS category_key, COUNT(*) AS task_count
+            FROM tasks
+            WHERE user_id = t.user_id
+            GROUP BY 1
+        ) c
+    ), '{}'::jsonb)
+FROM tasks t
+GROUP BY t.user_id
+ON CONFLICT (user_id) DO NOTHING;
+
+
+-- Архив завершенных задач (переносятся фоновым архиватором)
+CREATE TABLE archived_tasks (
+    task_id INTEGER PRIMARY KEY,
+    user_id INTEGER NOT NULL REFERENCES users(user_id) ON DELETE CASCADE,
+    title VARCHAR(255) NOT NULL,
+    description TEXT,
+    category_id INTEGER REFERENCES categories(category_id) ON DELETE SET NULL,
+    priority VARCHAR(20),
+    deadline TIMESTAMP,
+    is_repeating BOOLEAN DEFAULT FALSE,
+    repeat_interval VARCHAR(50),
+    status VARCHAR(20),
+    is_favorite BOOLEAN DEFAULT FALSE,
+    created_at TIMESTAMP,
+    updated_at TIMESTAMP,
+    completed_at TIMESTAMP,
+    archived_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE archived_task_tags (
+    task_id INTEGER REFERENCES archived_tasks(task_id) ON DELETE CASCADE,
+    tag_id INTEGER REFERENCES tags(tag_id) ON DELETE CASCADE,
+    PRIMARY KEY (task_id, tag_id)
+);
+
+CREATE INDEX idx_archived_tasks_user_id ON archived_tasks(user_id);
+CREATE INDEX idx_archived_tasks_category_id ON archived_tasks(category_id);
+CREATE INDEX idx_archived_task_tags_tag_id ON archived_task_tags(tag_id);
+
+-- Логи удаленной задачи удаляем, логи архивированной сохраняем
+CREATE OR REPLACE FUNCTION delete_task_analytics_logs()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF NOT EXISTS (SELECT 1 FROM archived_tasks WHERE task_id = OLD.task_id) THEN
+        DELETE FROM analytics_logs WHERE task_id = OLD.task_id;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER delete_task_analytics_logs
+AFTER DELETE ON tasks
+FOR EACH ROW
+EXECUTE FUNCTION delete_task_analytics_logs();
@@ -0,0 +1,54 @@
+-- Обновление существующей БД под архивацию завершенных задач.
+-- init_database.sql уже содержит эти изменения; скрипт можно запускать повторно.
+
+-- Логи архивированных задач должны пережить удаление строки из tasks
+ALTER TABLE analytics_logs DROP CONSTRAINT IF EXISTS analytics_logs_task_id_fkey;
+
+CREATE INDEX IF NOT EXISTS idx_analytics_logs_task_id ON analytics_logs(task_id);
+-- Поиск кандидатов на архивацию
+CREATE INDEX IF NOT EXISTS idx_tasks_completed_at ON tasks(completed_at) WHERE status = 'completed';
+
+CREATE TABLE IF NOT EXISTS archived_tasks (
+    task_id INTEGER PRIMARY KEY,
+    user_id INTEGER NOT NULL REFERENCES users(user_id) ON DELETE CASCADE,
+    title VARCHAR(255) NOT NULL,
+    description TEXT,
+    category_id INTEGER REFERENCES categories(category_id) ON DELETE SET NULL,
+    priority VARCHAR(20),
+    deadline TIMESTAMP,
+    is_repeating BOOLEAN DEFAULT FALSE,
+    repeat_interval VARCHAR(50),
+    status VARCHAR(20),
+    is_favorite BOOLEAN DEFAULT FALSE,
+    created_at TIMESTAMP,
+    updated_at TIMESTAMP,
+    completed_at TIMESTAMP,
+    archived_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS archived_task_tags (
+    task_id INTEGER REFERENCES archived_tasks(task_id) ON DELETE CASCADE,
+    tag_id INTEGER REFERENCES tags(tag_id) ON DELETE CASCADE,
+    PRIMARY KEY (task_id, tag_id)
+);
+
+CREATE INDEX IF NOT EXISTS idx_archived_tasks_user_id ON archived_tasks(user_id);
+CREATE INDEX IF NOT EXISTS idx_archived_tasks_category_id ON archived_tasks(category_id);
+CREATE INDEX IF NOT EXISTS idx_archived_task_tags_tag_id ON archived_task_tags(tag_id);
+
+-- Логи удаленной задачи удаляем, логи архивированной сохраняем
+CREATE OR REPLACE FUNCTION delete_task_analytics_logs()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF NOT EXISTS (SELECT 1 FROM archived_tasks WHERE task_id = OLD.task_id) THEN
+        DELETE FROM analytics_logs WHERE task_id = OLD.task_id;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS delete_task_analytics_logs ON tasks;
+CREATE TRIGGER delete_task_analytics_logs
+AFTER DELETE ON tasks
+FOR EACH ROW
+EXECUTE FUNCTION delete_task_analytics_logs();
@@ -0,0 +1,31 @@
+-- Обновление существующей БД: индексы под горячие запросы роутеров и триггеров.
+-- init_database.sql уже содержит эти индексы; скрипт можно запускать повторно.
+-- На больших таблицах индексы можно строить без блокировки записи:
+-- выполнять команды по одной вне транзакции, добавив CONCURRENTLY.
+
+-- GET /notifications/
+CREATE INDEX IF NOT EXISTS idx_notifications_user_read_sent ON notifications(user_id, is_read, sent_at DESC);
+CREATE INDEX IF NOT EXISTS idx_notifications_user_sent ON notifications(user_id, sent_at DESC);
+-- Проверка NOT EXISTS в триггере create_overdue_notification и каскадное удаление задач
+CREATE INDEX IF NOT EXISTS idx_notifications_task_id ON notifications(task_id);
+-- Частичный индекс из первой версии заменен idx_notifications_task_id
+DROP INDEX IF EXISTS idx_notifications_task_unread_overdue;
+
+-- GET /analytics-logs/ и /analytics-logs/stats/{user_id}
+CREATE INDEX IF NOT EXISTS idx_analytics_logs_user_timestamp ON analytics_logs(user_id, timestamp DESC);
+CREATE INDEX IF NOT EXISTS idx_analytics_logs_user_action ON analytics_logs(user_id, action);
+
+-- Каскадное удаление задач (ON DELETE CASCADE / SET NULL) без полного сканирования
+CREATE INDEX IF NOT EXISTS idx_analytics_logs_task_id ON analytics_logs(task_id);
+CREATE INDEX IF NOT EXISTS idx_tasks_category_id ON tasks(category_id);
+CREATE INDEX IF NOT EXISTS idx_task_tags_tag_id ON task_tags(tag_id);
+
+-- Поиск кандидатов на архивацию
+CREATE INDEX IF NOT EXISTS idx_tasks_completed_at ON tasks(completed_at) WHERE status = 'completed';
+
+-- Поиск тегов по префиксу (LIKE 'abc%') при любой локали БД
+CREATE INDEX IF NOT EXISTS idx_tags_name_prefix ON tags(name text_pattern_ops);
+
+-- Ближайший дедлайн незавершенных задач
+CREATE INDEX IF NOT EXISTS idx_tasks_user_open_deadline ON tasks(user_id, deadline)
+    WHERE status IN ('active', 'in_progress');
@@ -0,0 +1,148 @@
+-- Обновление существующей БД под сводку user_task_summary.
+-- init_database.sql уже содержит эти изменения; скрипт можно запускать повторно:
+-- каждый запуск пересчитывает сводку по текущим задачам.
+
+BEGIN;
+
+-- Задачи не меняются, пока ставится триггер и пересчитывается сводка
+LOCK TABLE tasks IN SHARE ROW EXCLUSIVE MODE;
+
+-- Сводка по задачам пользователя, поддерживается триггером на tasks
+CREATE TABLE IF NOT EXISTS user_task_summary (
+    user_id INTEGER PRIMARY KEY REFERENCES users(user_id) ON DELETE CASCADE,
+    total_count INTEGER NOT NULL DEFAULT 0,
+    active_count INTEGER NOT NULL DEFAULT 0,
+    in_progress_count INTEGER NOT NULL DEFAULT 0,
+    completed_count INTEGER NOT NULL DEFAULT 0,
+    overdue_count INTEGER NOT NULL DEFAULT 0,
+    high_priority_count INTEGER NOT NULL DEFAULT 0,
+    medium_priority_count INTEGER NOT NULL DEFAULT 0,
+    low_priority_count INTEGER NOT NULL DEFAULT 0,
+    favorite_count INTEGER NOT NULL DEFAULT 0,
+    category_counts JSONB NOT NULL DEFAULT '{}'::jsonb,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Ближайший дедлайн незавершенных задач берется по этому индексу
+CREATE INDEX IF NOT EXISTS idx_tasks_user_open_deadline ON tasks(user_id, deadline)
+    WHERE status IN ('active', 'in_progress');
+
+CREATE OR REPLACE FUNCTION apply_task_summary_delta(
+    p_user_id INTEGER,
+    p_status VARCHAR,
+    p_priority VARCHAR,
+    p_category_id INTEGER,
+    p_is_favorite BOOLEAN,
+    p_sign INTEGER
+)
+RETURNS VOID AS $$
+DECLARE
+    v_category_key TEXT := COALESCE(p_category_id::text, 'none');
+BEGIN
+    -- Строку создаем только при добавлении: при каскадном удалении пользователя ее уже нет
+    IF p_sign > 0 THEN
+        INSERT INTO user_task_summary (user_id) VALUES (p_user_id)
+        ON CONFLICT (user_id) DO NOTHING;
+    END IF;
+
+    UPDATE user_task_summary SET
+        total_count = total_count + p_sign,
+        active_count = active_count + CASE WHEN p_status = 'active' THEN p_sign ELSE 0 END,
+        in_progress_count = in_progress_count + CASE WHEN p_status = 'in_progress' THEN p_sign ELSE 0 END,
+        completed_count = completed_count + CASE WHEN p_status = 'completed' THEN p_sign ELSE 0 END,
+        overdue_count = overdue_count + CASE WHEN p_status = 'overdue' THEN p_sign ELSE 0 END,
+        high_priority_count = high_priority_count + CASE WHEN p_priority = 'high' THEN p_sign ELSE 0 END,
+        medium_priority_count = medium_priority_count + CASE WHEN p_priority = 'medium' THEN p_sign ELSE 0 END,
+        low_priority_count = low_priority_count + CASE WHEN p_priority = 'low' THEN p_sign ELSE 0 END,
+        favorite_count = favorite_count + CASE WHEN p_is_favorite THEN p_sign ELSE 0 END,
+        category_counts = CASE
+            WHEN COALESCE((category_counts ->> v_category_key)::int, 0) + p_sign <= 0
+                THEN category_counts - v_category_key
+            ELSE jsonb_set(
+                category_counts,
+                ARRAY[v_category_key],
+                to_jsonb(COALESCE((category_counts ->> v_category_key)::int, 0) + p_sign)
+            )
+        END,
+        updated_at = CURRENT_TIMESTAMP
+    WHERE user_id = p_user_id;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION sync_user_task_summary()
+RETURNS TRIGGER AS $$
+BEGIN
+    -- Изменения, не влияющие на счетчики, пропускаем
+    IF TG_OP = 'UPDATE'
+       AND OLD.user_id = NEW.user_id
+       AND OLD.status IS NOT DISTINCT FROM NEW.status
+       AND OLD.priority IS NOT DISTINCT FROM NEW.priority
+       AND OLD.category_id IS NOT DISTINCT FROM NEW.category_id
+       AND OLD.is_favorite IS NOT DISTINCT FROM NEW.is_favorite THEN
+        RETURN NULL;
+    END IF;
+
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        PERFORM apply_task_summary_delta(OLD.user_id, OLD.status, OLD.priority, OLD.category_id, OLD.is_favorite, -1);
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        PERFORM apply_task_summary_delta(NEW.user_id, NEW.status, NEW.priority, NEW.category_id, NEW.is_favorite, 1);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS sync_user_task_summary ON tasks;
+CREATE TRIGGER sync_user_task_summary
+AFTER INSERT OR UPDATE OR DELETE ON tasks
+FOR EACH ROW
+EXECUTE FUNCTION sync_user_task_summary();
+
+-- Пересчет сводки по текущим задачам (исправляет и строки, накопленные без триггера)
+INSERT INTO user_task_summary (
+    user_id, total_count, active_count, in_progress_count, completed_count, overdue_count,
+    high_priority_count, medium_priority_count, low_priority_count, favorite_count, category_counts
+)
+SELECT
+    t.user_id,
+    COUNT(*),
+    COUNT(*) FILTER (WHERE t.status = 'active'),
+    COUNT(*) FILTER (WHERE t.status = 'in_progress'),
+    COUNT(*) FILTER (WHERE t.status = 'completed'),
+    COUNT(*) FILTER (WHERE t.status = 'overdue'),
+    COUNT(*) FILTER (WHERE t.priority = 'high'),
+    COUNT(*) FILTER (WHERE t.priority = 'medium'),
+    COUNT(*) FILTER (WHERE t.priority = 'low'),
+    COUNT(*) FILTER (WHERE t.is_favorite),
+    COALESCE((
+        SELECT jsonb_object_agg(c.category_key, c.task_count)
+        FROM (
+            SELECT COALESCE(category_id::text, 'none') AS category_key, COUNT(*) AS task_count
+            FROM tasks
+            WHERE user_id = t.user_id
+            GROUP BY 1
+        ) c
+    ), '{}'::jsonb)
+FROM tasks t
+GROUP BY t.user_id
+ON CONFLICT (user_id) DO UPDATE SET
+    total_count = EXCLUDED.total_count,
+    active_count = EXCLUDED.active_count,
+    in_progress_count = EXCLUDED.in_progress_count,
+    completed_count = EXCLUDED.completed_count,
+    overdue_count = EXCLUDED.overdue_count,
+    high_priority_count = EXCLUDED.high_priority_count,
+    medium_priority_count = EXCLUDED.medium_priority_count,
+    low_priority_count = EXCLUDED.low_priority_count,
+    favorite_count = EXCLUDED.favorite_count,
+    category_counts = EXCLUDED.category_counts,
+    updated_at = CURRENT_TIMESTAMP;
+
+-- Пользователи без задач: счетчики обнуляем
+UPDATE user_task_summary s SET
+    total_count = 0, active_count = 0, in_progress_count = 0, completed_count = 0, overdue_count = 0,
+    high_priority_count = 0, medium_priority_count = 0, low_priority_count = 0, favorite_count = 0,
+    category_counts = '{}'::jsonb, updated_at = CURRENT_TIMESTAMP
+WHERE NOT EXISTS (SELECT 1 FROM tasks t WHERE t.user_id = s.user_id);
+
+COMMIT;
@@ -0,0 +1,36 @@
+from datetime import timedelta
+from pathlib import Path
+from sqlalchemy import func
+from app.models.analytics_log import AnalyticsLog
+from app.models.archived_task import ArchivedTask
+from app.models.task import Task, StatusEnum
+from app.services.archiver import archive_completed_tasks
+
+UPGRADE_SQL = Path(__file__).resolve().parent.parent / "sql" / "upgrade_archive_tasks.sql"
+
+def _run_script(db, path: Path):
+    cursor = db.connection().connection.driver_connection.cursor()
+    cursor.execute(path.read_text(encoding="utf-8"))
+    cursor.close()
+
+def test_archiving_keeps_analytics_logs(db):
+    cutoff = func.now() - timedelta(days=60)
+    old_ids = [task_id for (task_id,) in db.query(Task.task_id).filter(
+        Task.status == StatusEnum.completed.value, Task.completed_at < cutoff
+    )]
+    logs_before = db.query(func.count(AnalyticsLog.log_id)).filter(AnalyticsLog.task_id.in_(old_ids)).scalar()
+    assert old_ids and logs_before
+
+    archived = archive_completed_tasks(db, older_than=timedelta(days=60), batch_size=500)
+
+    assert archived == len(old_ids)
+    assert db.query(func.count(Task.task_id)).filter(Task.task_id.in_(old_ids)).scalar() == 0
+    assert db.query(func.count(ArchivedTask.task_id)).filter(ArchivedTask.task_id.in_(old_ids)).scalar() == archived
+    logs_after = db.query(func.count(AnalyticsLog.log_id)).filter(AnalyticsLog.task_id.in_(old_ids)).scalar()
+    assert logs_after == logs_before
+
+def test_upgrade_script_is_idempotent(db):
+    # На уже обновленной схеме скрипт ничего не ломает и может выполняться повторно
+    _run_script(db, UPGRADE_SQL)
+    _run_script(db, UPGRADE_SQL)
+    assert archive_completed_tasks(db, older_than=timedelta(days=365)) == 0
@@ -0,0 +1,29 @@
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from app.api import batch
+
+def _client():
+    app = FastAPI()
+    app.include_router(batch.router, prefix="/batch")
+
+    @app.get("/stored")
+    def stored():
+        # Строка из данных пользователя, например имя тега
+        return {"path": "/batch/", "dotted": "/tags/../batch"}
+
+    return TestClient(app)
+
+def test_nested_batch_is_rejected_upfront():
+    response = _client().post("/batch/", json={"requests": [
+        {"method": "POST", "path": "/./batch/", "body": {"requests": []}}
+    ]})
+    assert response.status_code == 400
+
+def test_nested_batch_via_reference_is_rejected():
+    for reference in ("${a.path}", "${a.dotted}"):
+        response = _client().post("/batch/", json={"atomic": False, "requests": [
+            {"id": "a", "method": "GET", "path": "/stored"},
+            {"method": "POST", "path": reference, "body": {"requests": []}},
+        ]})
+        assert response.status_code == 200
+        assert [result["status"] for result in response.json()["results"]] == [200, 400]
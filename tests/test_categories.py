@@ -0,0 +1,30 @@
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from app.api import categories
+from app.database.db import get_db
+from app.database.replicas import ReplicaRouter
+
+@pytest.fixture
+def router(monkeypatch):
+    router = ReplicaRouter(urls=[])
+    monkeypatch.setattr(categories, "replica_router", router)
+    return router
+
+@pytest.fixture
+def client(db):
+    app = FastAPI()
+    app.include_router(categories.router, prefix="/categories")
+    app.dependency_overrides[get_db] = lambda: db
+    return TestClient(app)
+
+def test_update_and_delete_remember_owner_write(client, router):
+    # Категория 7 принадлежит пользователю 7 (conftest)
+    assert client.put("/categories/7", json={"color": "#ff0000"}).status_code == 200
+    assert router._recently_wrote(7)
+
+    router._last_writes.clear()
+    response = client.delete("/categories/7")
+    assert response.status_code == 200, response.text
+    assert router._recently_wrote(7)
+    assert client.delete("/categories/7").status_code == 404
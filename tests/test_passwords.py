@@ -0,0 +1,31 @@
+import hashlib
+import pytest
+from app.services import passwords
+
+@pytest.fixture(autouse=True)
+def cheap_scrypt(monkeypatch):
+    monkeypatch.setattr(passwords, "SCRYPT_N", 2 ** 10)
+
+def test_client_digest_is_stored_as_scrypt():
+    stored = passwords.hash_client_digest(hashlib.sha256(b"secret").hexdigest())
+    assert stored.startswith("scrypt-sha256$")
+    assert passwords.verify_password("secret", stored)
+    assert not passwords.verify_password("wrong", stored)
+    # При входе пароль известен, хэш переводится в обычный scrypt
+    assert passwords.needs_rehash(stored)
+
+def test_scrypt_hash_roundtrip():
+    stored = passwords.hash_password("secret")
+    assert passwords.verify_password("secret", stored)
+    assert not passwords.verify_password("wrong", stored)
+    assert not passwords.needs_rehash(stored)
+
+def test_legacy_sha256_still_verifies_and_needs_rehash():
+    legacy = hashlib.sha256(b"secret").hexdigest()
+    assert passwords.verify_password("secret", legacy)
+    assert passwords.needs_rehash(legacy)
+
+def test_cost_change_needs_rehash(monkeypatch):
+    stored = passwords.hash_password("secret")
+    monkeypatch.setattr(passwords, "SCRYPT_N", 2 ** 11)
+    assert passwords.needs_rehash(stored)
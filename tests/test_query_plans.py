@@ -0,0 +1,116 @@
+import json
+from pathlib import Path
+from sqlalchemy import select, text
+from sqlalchemy.dialects import postgresql
+from app.api.analytics_logs import _logs_query, _stats_query
+from app.api.notifications import _notifications_query
+from app.api.tags import _suggest_query
+from app.api.task_tags import _task_tags_query
+from app.api.tasks import _tasks_query, _tags_query
+from app.models.task import Task
+from app.models.task_tag import TaskTag
+import app.models.task, app.models.tag, app.models.user, app.models.category  # noqa: F401  (связи моделей)
+
+UPGRADE_SQL = Path(__file__).resolve().parent.parent / "sql" / "upgrade_indexes.sql"
+
+INDEXES = (
+    "idx_notifications_user_read_sent", "idx_notifications_user_sent", "idx_notifications_task_id",
+    "idx_analytics_logs_user_timestamp", "idx_analytics_logs_user_action", "idx_analytics_logs_task_id",
+    "idx_tasks_category_id", "idx_tasks_completed_at", "idx_task_tags_tag_id", "idx_tags_name_prefix",
+    "idx_tasks_user_open_deadline",
+)
+
+def _plan_nodes(db, statement) -> list[dict]:
+    """Узлы плана EXPLAIN (FORMAT JSON) списком, без вложенности"""
+    if not isinstance(statement, str):
+        statement = str(statement.compile(dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True}))
+    plan = db.execute(text(f"EXPLAIN (FORMAT JSON) {statement}")).scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    nodes, stack = [], [plan[0]["Plan"]]
+    while stack:
+        node = stack.pop()
+        nodes.append(node)
+        stack.extend(node.get("Plans", []))
+    return nodes
+
+def assert_uses_index(db, statement, table: str, *indexes: str):
+    """Таблица читается без Seq Scan и через один из ожидаемых индексов"""
+    nodes = _plan_nodes(db, statement)
+    assert not any(
+        node["Node Type"] == "Seq Scan" and node.get("Relation Name") == table for node in nodes
+    ), f"Seq Scan on {table}: {nodes}"
+    assert any(node.get("Index Name") in indexes for node in nodes), f"{indexes} not used: {nodes}"
+
+# Запросы строятся теми же функциями, что вызывают роутеры
+
+def test_notifications_list_by_read_state(db):
+    # GET /notifications/?user_id=&is_read=
+    query = _notifications_query(db, 42, False)
+    assert_uses_index(db, query.statement, "notifications", "idx_notifications_user_read_sent")
+
+def test_notifications_list_by_user(db):
+    # GET /notifications/?user_id=
+    query = _notifications_query(db, 42, None)
+    assert_uses_index(db, query.statement, "notifications", "idx_notifications_user_sent")
+
+def test_analytics_logs_by_user(db):
+    # GET /analytics-logs/?user_id=
+    query = _logs_query(db, 42)
+    # Оба индекса начинаются с user_id, планировщик выбирает по статистике
+    assert_uses_index(
+        db, query.statement, "analytics_logs", "idx_analytics_logs_user_timestamp", "idx_analytics_logs_user_action"
+    )
+
+def test_analytics_stats(db):
+    # GET /analytics-logs/stats/{user_id}
+    query = _stats_query(db, 42)
+    assert_uses_index(
+        db, query.statement, "analytics_logs", "idx_analytics_logs_user_action", "idx_analytics_logs_user_timestamp"
+    )
+
+def test_tasks_list_by_user(db):
+    # GET /tasks/?user_id=
+    query = _tasks_query(db, Task, 42)
+    assert_uses_index(db, query.statement, "tasks", "idx_tasks_user_id")
+
+def test_tags_of_user_tasks(db):
+    # Теги в GET /tasks/: связи по task_id задач пользователя, имена по первичному ключу tags
+    query = _tags_query(db, TaskTag, select(Task.task_id).where(Task.user_id == 42))
+    assert_uses_index(db, query.statement, "task_tags", "task_tags_pkey")
+    assert_uses_index(db, query.statement, "tags", "tags_pkey")
+
+def test_tags_of_single_task(db):
+    # GET /tasks/{task_id} и GET /task-tags/?task_id=
+    assert_uses_index(db, _tags_query(db, TaskTag, [4242]).statement, "task_tags", "task_tags_pkey")
+    assert_uses_index(db, _task_tags_query(db, 4242).statement, "task_tags", "task_tags_pkey")
+
+def test_task_tags_by_tag(db):
+    # Задачи с тегом и каскадное удаление тега
+    query = select(TaskTag.task_id).where(TaskTag.tag_id == 7)
+    assert_uses_index(db, query, "task_tags", "idx_task_tags_tag_id")
+
+def test_overdue_trigger_probe(db):
+    # NOT EXISTS в create_overdue_notification
+    probe = """
+        SELECT 1 FROM notifications
+        WHERE task_id = 4242 AND type = 'overdue' AND is_read = FALSE
+    """
+    assert_uses_index(db, probe, "notifications", "idx_notifications_task_id")
+
+def test_tag_suggestions_by_prefix(db):
+    # GET /tags/suggest?prefix=&user_id=
+    query = _suggest_query(db, "tag42%", 42, 10)
+    assert_uses_index(db, query.statement, "tags", "idx_tags_name_prefix")
+
+def test_upgrade_script_creates_indexes(db):
+    # Старая БД без индексов: удаляем их внутри откатываемой транзакции теста
+    db.execute(text(f"DROP INDEX {', '.join(INDEXES)}"))
+    cursor = db.connection().connection.driver_connection.cursor()
+    for _ in range(2):
+        cursor.execute(UPGRADE_SQL.read_text(encoding="utf-8"))
+    cursor.close()
+    existing = set(db.execute(text(
+        "SELECT indexname FROM pg_indexes WHERE schemaname = current_schema()"
+    )).scalars())
+    assert set(INDEXES) <= existing
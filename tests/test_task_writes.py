@@ -0,0 +1,91 @@
+from types import SimpleNamespace
+import pytest
+from fastapi import FastAPI, HTTPException
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+from sqlalchemy.exc import IntegrityError
+from app.api import tasks
+from app.database.db import get_db, get_read_db
+
+# Точки сохранения добавляет тестовая сессия (join_transaction_mode), эндпоинт их не выполняет
+SAVEPOINT_STATEMENTS = ("SAVEPOINT", "RELEASE SAVEPOINT", "ROLLBACK TO SAVEPOINT")
+
+@pytest.fixture
+def client(db):
+    app = FastAPI()
+    app.include_router(tasks.router, prefix="/tasks")
+    app.dependency_overrides[get_db] = lambda: db
+    app.dependency_overrides[get_read_db] = lambda: db
+    return TestClient(app)
+
+@pytest.fixture
+def statements(db):
+    """SQL-запросы, выполненные через соединение тестовой сессии"""
+    executed: list[str] = []
+    connection = db.connection()
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if not statement.lstrip().upper().startswith(SAVEPOINT_STATEMENTS):
+            executed.append(statement)
+
+    event.listen(connection, "before_cursor_execute", before_cursor_execute)
+    yield executed
+    event.remove(connection, "before_cursor_execute", before_cursor_execute)
+
+def test_create_task_is_one_statement(client, statements):
+    response = client.post("/tasks/?user_id=3", json={"title": "Write report", "category_id": 3, "priority": "high"})
+    assert response.status_code == 200, response.text
+    assert response.json()["title"] == "Write report"
+    assert len(statements) == 1, statements
+
+def test_update_task_is_one_statement(client, statements):
+    # Задача 1 из начальных данных принадлежит пользователю 2
+    response = client.put("/tasks/1?user_id=2", json={"status": "completed", "is_favorite": True})
+    assert response.status_code == 200, response.text
+    assert response.json()["status"] == "completed"
+    assert response.json()["completed_at"] is not None
+    assert len(statements) == 1, statements
+
+def test_list_tasks_loads_tags_in_one_query(client, statements):
+    response = client.get("/tasks/?user_id=3")
+    assert response.status_code == 200, response.text
+    items = response.json()
+    assert items and all(len(item["tags"]) == 1 for item in items)
+    # Задачи и теги всех задач, без запроса на каждую задачу
+    assert len(statements) == 2, statements
+
+def test_update_foreign_task_is_not_found(client):
+    response = client.put("/tasks/1?user_id=3", json={"title": "Not mine"})
+    assert response.status_code == 404
+
+def test_create_task_unknown_user_is_not_found(client):
+    response = client.post("/tasks/?user_id=999999", json={"title": "Orphan"})
+    assert response.status_code == 404
+    assert response.json()["detail"] == "User not found"
+
+def test_create_task_unknown_category_is_not_found(client):
+    response = client.post("/tasks/?user_id=3", json={"title": "Orphan", "category_id": 999999})
+    assert response.status_code == 404
+    assert response.json()["detail"] == "Category not found"
+
+def test_update_task_unknown_category_is_not_found(client):
+    response = client.put("/tasks/1?user_id=2", json={"category_id": 999999})
+    assert response.status_code == 404
+    assert response.json()["detail"] == "Category not found"
+
+@pytest.mark.parametrize("constraint, detail", [
+    ("tasks_user_id_fkey", "User not found"),
+    ("tasks_category_id_fkey", "Category not found"),
+])
+def test_foreign_key_violation_maps_to_404(constraint, detail):
+    orig = SimpleNamespace(diag=SimpleNamespace(constraint_name=constraint))
+    with pytest.raises(HTTPException) as raised:
+        tasks._raise_for_integrity_error(IntegrityError("INSERT ...", {}, orig))
+    assert raised.value.status_code == 404
+    assert raised.value.detail == detail
+
+def test_other_integrity_error_is_bad_request():
+    orig = SimpleNamespace(diag=SimpleNamespace(constraint_name="tasks_priority_check"))
+    with pytest.raises(HTTPException) as raised:
+        tasks._raise_for_integrity_error(IntegrityError("INSERT ...", {}, orig))
+    assert raised.value.status_code == 400
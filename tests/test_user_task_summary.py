@@ -0,0 +1,113 @@
+import uuid
+from datetime import timedelta
+from pathlib import Path
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+from app.api import tasks, users
+from app.database.db import get_db
+from app.services.archiver import archive_completed_tasks
+
+ROOT = Path(__file__).resolve().parent.parent
+INIT_SQL = ROOT / "sql" / "init_database.sql"
+UPGRADE_SQL = ROOT / "sql" / "upgrade_user_task_summary.sql"
+
+COUNTERS = (
+    "total_count", "active_count", "in_progress_count", "completed_count", "overdue_count",
+    "high_priority_count", "medium_priority_count", "low_priority_count", "favorite_count",
+)
+
+@pytest.fixture
+def client(db):
+    app = FastAPI()
+    app.include_router(tasks.router, prefix="/tasks")
+    app.include_router(users.router, prefix="/users")
+    app.dependency_overrides[get_db] = lambda: db
+    return TestClient(app)
+
+@pytest.fixture
+def user_id(db):
+    user_id = db.execute(text(
+        "INSERT INTO users (email, password_hash) VALUES (:email, 'x') RETURNING user_id"
+    ), {"email": f"{uuid.uuid4().hex}@example.com"}).scalar()
+    category_id = db.execute(text(
+        "INSERT INTO categories (user_id, name) VALUES (:user_id, 'Work') RETURNING category_id"
+    ), {"user_id": user_id}).scalar()
+    db.info["category_id"] = category_id
+    return user_id
+
+def _summary(client, user_id: int) -> dict:
+    response = client.get(f"/users/{user_id}/summary")
+    assert response.status_code == 200, response.text
+    return response.json()
+
+def test_counters_follow_task_changes(db, client, user_id):
+    category_id = db.info["category_id"]
+    first = client.post(f"/tasks/?user_id={user_id}", json={
+        "title": "A", "priority": "high", "category_id": category_id, "is_favorite": True
+    }).json()
+    second = client.post(f"/tasks/?user_id={user_id}", json={"title": "B", "priority": "low"}).json()
+
+    summary = _summary(client, user_id)
+    assert summary["total"] == 2
+    assert summary["by_status"]["active"] == 2
+    assert summary["by_priority"] == {"high": 1, "medium": 0, "low": 1}
+    assert summary["by_category"] == {str(category_id): 1, "none": 1}
+    assert summary["favorites"] == 1
+
+    client.put(f"/tasks/{first['task_id']}?user_id={user_id}", json={"status": "completed", "priority": "medium"})
+    summary = _summary(client, user_id)
+    assert summary["by_status"]["active"] == 1
+    assert summary["by_status"]["completed"] == 1
+    assert summary["by_priority"] == {"high": 0, "medium": 1, "low": 1}
+
+    assert client.delete(f"/tasks/{second['task_id']}?user_id={user_id}").status_code == 200
+    summary = _summary(client, user_id)
+    assert summary["total"] == 1
+    assert summary["by_category"] == {str(category_id): 1}
+
+    # Архивированная задача уходит из сводки так же, как из GET /tasks/
+    db.execute(text("UPDATE tasks SET completed_at = now() - interval '400 days' WHERE task_id = :task_id"),
+               {"task_id": first["task_id"]})
+    db.commit()
+    assert archive_completed_tasks(db, older_than=timedelta(days=365)) == 1
+    summary = _summary(client, user_id)
+    assert summary["total"] == 0
+    assert summary["by_status"]["completed"] == 0
+    assert summary["by_category"] == {}
+    assert summary["favorites"] == 0
+
+def test_upgrade_script_backfills_existing_database(pg_engine):
+    """Старая БД: таблица сводки пустая (create_all) и без триггера"""
+    schema = f"upgrade_{uuid.uuid4().hex[:12]}"
+    raw = pg_engine.raw_connection()
+    try:
+        raw.autocommit = True
+        cursor = raw.cursor()
+        cursor.execute(f"CREATE SCHEMA {schema}; SET search_path TO {schema}")
+        cursor.execute(INIT_SQL.read_text(encoding="utf-8"))
+        cursor.execute("""
+            DROP TRIGGER sync_user_task_summary ON tasks;
+            DROP FUNCTION sync_user_task_summary();
+            DROP FUNCTION apply_task_summary_delta(INTEGER, VARCHAR, VARCHAR, INTEGER, BOOLEAN, INTEGER);
+            INSERT INTO users (email, password_hash) VALUES ('a@example.com', 'x'), ('b@example.com', 'x');
+            INSERT INTO tasks (user_id, title, status, priority, is_favorite) VALUES
+                (1, 'one', 'active', 'high', TRUE),
+                (1, 'two', 'completed', 'low', FALSE),
+                (2, 'three', 'in_progress', 'medium', FALSE);
+        """)
+        for _ in range(2):
+            cursor.execute(UPGRADE_SQL.read_text(encoding="utf-8"))
+        # Триггер установлен: новые изменения попадают в сводку
+        cursor.execute("INSERT INTO tasks (user_id, title, status) VALUES (2, 'four', 'active')")
+
+        cursor.execute(f"SELECT user_id, {', '.join(COUNTERS)} FROM user_task_summary ORDER BY user_id")
+        assert cursor.fetchall() == [
+            (1, 2, 1, 0, 1, 0, 1, 0, 1, 1),
+            (2, 2, 1, 1, 0, 0, 0, 1, 0, 0),
+        ]
+    finally:
+        raw.cursor().execute(f"DROP SCHEMA IF EXISTS {schema} CASCADE")
+        # search_path соединения изменен: в пул его не возвращаем
+        raw.invalidate()